@@ -0,0 +1,163 @@
+"""
+Attendance rollups for the analytics endpoint.
+
+Counts are grouped in the database per (user, month). Cells from FINALIZED
+sessions never change, so they are accumulated in the cache and only
+sessions finalized since the last request are aggregated again; OPEN
+sessions are always counted live. Grouping by SIG / year of study is a
+merge of those cells using each member's current profile; a member of
+several SIGs is counted under each of them.
+
+invalidate_rollup only reaches the cache it runs against, so with a
+per-process cache the cells are kept for LOCAL_ROLLUP_TIMEOUT: another
+worker's edit to a finalized session shows up within that.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+from core.caching import is_shared_cache
+from .models import AttendanceSession, AttendanceRecord
+
+ROLLUP_KEY = 'attendance:rollup:finalized'
+ROLLUP_TIMEOUT = 60 * 60 * 24
+LOCAL_ROLLUP_TIMEOUT = 60
+GROUPS = ('user', 'sig', 'year', 'month')
+
+
+def _user_month_cells(records):
+    """(user_id, 'YYYY-MM') -> [total, present, excused] for a record queryset."""
+    rows = (
+        records.annotate(month=TruncMonth('session__date'))
+        .values('user_id', 'month')
+        .annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='PRESENT')),
+            excused=Count('id', filter=Q(status='EXCUSED')),
+        )
+        .order_by()
+    )
+    return {
+        (r['user_id'], r['month'].strftime('%Y-%m')): [r['total'], r['present'], r['excused']]
+        for r in rows
+    }
+
+
+def _merge(into, cells):
+    for key, counts in cells.items():
+        acc = into.setdefault(key, [0, 0, 0])
+        for i, n in enumerate(counts):
+            acc[i] += n
+    return into
+
+
+def finalized_cells():
+    """Cached cells for all FINALIZED sessions, topped up with newly finalized ones."""
+    final_ids = set(AttendanceSession.objects.filter(status='FINALIZED').values_list('id', flat=True))
+    cached = cache.get(ROLLUP_KEY)
+    if cached is None or not set(cached['sessions']) <= final_ids:
+        # First run, or a session was re-opened / deleted since: start over
+        cached = {'sessions': [], 'cells': {}}
+
+    new_ids = final_ids - set(cached['sessions'])
+    if new_ids:
+        _merge(cached['cells'], _user_month_cells(AttendanceRecord.objects.filter(session_id__in=new_ids)))
+        cached['sessions'] = sorted(final_ids)
+        cache.set(ROLLUP_KEY, cached, ROLLUP_TIMEOUT if is_shared_cache('default') else LOCAL_ROLLUP_TIMEOUT)
+    return cached['cells'], len(final_ids)
+
+
+def invalidate_rollup():
+    """Called when records of a finalized session are edited."""
+    cache.delete(ROLLUP_KEY)
+
+
+def attendance_rollup(group_by='user', include_open=True, user_id=None, sig=None, year=None,
+                      month_from=None, month_to=None):
+    from users.models import User
+
+    cells, finalized = finalized_cells()
+    cells = dict(cells)
+    open_sessions = 0
+    if include_open:
+        open_ids = list(AttendanceSession.objects.filter(status='OPEN').values_list('id', flat=True))
+        open_sessions = len(open_ids)
+        if open_ids:
+            cells = _merge({k: list(v) for k, v in cells.items()},
+                           _user_month_cells(AttendanceRecord.objects.filter(session_id__in=open_ids)))
+
+    if month_from:
+        cells = {k: v for k, v in cells.items() if k[1] >= month_from}
+    if month_to:
+        cells = {k: v for k, v in cells.items() if k[1] <= month_to}
+    if user_id is not None:
+        cells = {k: v for k, v in cells.items() if k[0] == user_id}
+
+    users = {}
+    uids = {uid for uid, _ in cells}
+    if uids:
+        members = User.objects.filter(id__in=uids).values(
+            'id', 'username', 'profile__full_name', 'profile__sig', 'profile__year_of_study'
+        )
+        if year is not None:
+            members = members.filter(profile__year_of_study=year)
+        users = {m['id']: dict(m, sigs=[m['profile__sig']] if m['profile__sig'] else []) for m in members}
+        # SIG memberships live in profile.sigs; the legacy profile.sig text field is kept as a fallback
+        if group_by == 'sig' or sig:
+            memberships = (
+                User.objects.filter(id__in=users, profile__sigs__isnull=False)
+                .values_list('id', 'profile__sigs__name')
+            )
+            for uid, name in memberships:
+                if name not in users[uid]['sigs']:
+                    users[uid]['sigs'].append(name)
+        if sig:
+            wanted = sig.lower()
+            users = {uid: m for uid, m in users.items() if any(n.lower() == wanted for n in m['sigs'])}
+
+    groups = defaultdict(lambda: [0, 0, 0])
+    for (uid, month), counts in cells.items():
+        member = users.get(uid)
+        if member is None:
+            continue
+        if group_by == 'user':
+            keys = [uid]
+        elif group_by == 'sig':
+            # A member of several SIGs counts towards each of them
+            keys = member['sigs'] or [None]
+        elif group_by == 'year':
+            keys = [member['profile__year_of_study']]
+        else:
+            keys = [month]
+        for key in keys:
+            acc = groups[key]
+            for i, n in enumerate(counts):
+                acc[i] += n
+
+    results = []
+    for key, (total, present, excused) in groups.items():
+        row = {
+            'key': key,
+            'total': total,
+            'present': present,
+            'excused': excused,
+            'absent': total - present - excused,
+            'attendance_rate': round(present * 100 / total, 1) if total else None,
+        }
+        if group_by == 'user':
+            row['username'] = users[key]['username']
+            row['full_name'] = users[key]['profile__full_name']
+        results.append(row)
+
+    if group_by == 'month':
+        results.sort(key=lambda r: r['key'])
+    else:
+        results.sort(key=lambda r: (r['attendance_rate'] is None, -(r['attendance_rate'] or 0)))
+
+    return {
+        'group_by': group_by,
+        'sessions': {'finalized': finalized, 'open': open_sessions},
+        'results': results,
+    }
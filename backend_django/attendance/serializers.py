@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.db.models import Count, Q
 from .models import AttendanceSession, AttendanceRecord
 from users.serializers import UserSerializer
 from users.models import User, MemberProfile
@@ -40,9 +41,16 @@ class AttendanceSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_by', 'created_at', 'stats', 'target_sigs']
 
     def get_stats(self, obj):
-        total = obj.records.count()
-        present = obj.records.filter(status='PRESENT').count()
-        excused = obj.records.filter(status='EXCUSED').count()
+        if hasattr(obj, 'stats_total'):
+            # Annotated by AttendanceSessionViewSet.get_queryset
+            total, present, excused = obj.stats_total, obj.stats_present, obj.stats_excused
+        else:
+            counts = obj.records.aggregate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status='PRESENT')),
+                excused=Count('id', filter=Q(status='EXCUSED')),
+            )
+            total, present, excused = counts['total'], counts['present'], counts['excused']
         absent = total - present - excused
         return {
             'total': total,
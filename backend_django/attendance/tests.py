@@ -1,3 +1,182 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import User, MemberProfile, Sig
+from .analytics import ROLLUP_KEY, attendance_rollup
+from .models import AttendanceSession, AttendanceRecord
+
+
+class AttendanceTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', is_superuser=True, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _member(self, username, year='', sig=''):
+        user = User.objects.create_user(username)
+        MemberProfile.objects.create(user=user, full_name=username.title(), year=year, sig=sig)
+        return user
+
+    def _session(self, **kwargs):
+        return AttendanceSession.objects.create(date=timezone.now(), created_by=self.admin, **kwargs)
+
+
+class BatchUpdateTests(AttendanceTestCase):
+    def _roster(self, size):
+        session = self._session(status='OPEN')
+        users = [self._member(f'm{session.id}_{i}') for i in range(size)]
+        AttendanceRecord.objects.bulk_create([AttendanceRecord(session=session, user=u) for u in users])
+        return session, users
+
+    def test_updates_statuses_and_reports_rejected_rows(self):
+        session, users = self._roster(3)
+        outsider = self._member('outsider')
+        response = self.client.post(f'/api/attendance/sessions/{session.id}/batch_update/', {'updates': [
+            {'user_id': users[0].id, 'status': 'ABSENT'},
+            {'user_id': users[0].id, 'status': 'PRESENT'},  # Last entry wins
+            {'user_id': users[1].id, 'status': 'EXCUSED'},
+            {'user_id': users[2].id, 'status': 'LATE'},
+            {'user_id': 'x', 'status': 'PRESENT'},
+            {'user_id': outsider.id, 'status': 'PRESENT'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        failed = {str(r['user_id']) for r in response.data['results'] if not r['ok']}
+        self.assertEqual(failed, {str(users[2].id), 'x', str(outsider.id)})
+
+        statuses = dict(session.records.values_list('user_id', 'status'))
+        self.assertEqual(statuses, {users[0].id: 'PRESENT', users[1].id: 'EXCUSED', users[2].id: 'ABSENT'})
+        self.assertFalse(AttendanceRecord.objects.filter(user=outsider).exists())
+        self.assertEqual(session.records.get(user=users[0]).marked_by, self.admin)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        def run(size):
+            session, users = self._roster(size)
+            updates = [{'user_id': u.id, 'status': ('PRESENT', 'EXCUSED')[i % 2]} for i, u in enumerate(users)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(
+                    f'/api/attendance/sessions/{session.id}/batch_update/', {'updates': updates}, format='json'
+                )
+            self.assertEqual(response.data['updated'], size)
+            return len(ctx)
+
+        self.assertEqual(run(4), run(40))
+
+
+class PopulateTests(AttendanceTestCase):
+    def test_populate_counts_added_and_is_idempotent(self):
+        session = self._session()
+        existing = self._member('existing')
+        AttendanceRecord.objects.create(session=session, user=existing, status='PRESENT')
+        self._member('fresh')
+        User.objects.create_user('inactive', is_active=False)
+
+        response = self.client.post(f'/api/attendance/sessions/{session.id}/populate/')
+        # Admin, existing and fresh are active; existing already had a record
+        self.assertEqual(response.data, {'added': 2, 'total_eligible': 3})
+        self.assertEqual(session.records.get(user=existing).status, 'PRESENT')
+
+        response = self.client.post(f'/api/attendance/sessions/{session.id}/populate/')
+        self.assertEqual(response.data, {'added': 0, 'total_eligible': 3})
+        self.assertEqual(session.records.count(), 3)
+
+    def test_populate_filters_by_year_and_sig(self):
+        sig = Sig.objects.create(name='Robotics')
+        by_name = self._member('by_name', year='2nd Year', sig='Robotics')
+        by_m2m = self._member('by_m2m', year='2')
+        by_m2m.profile.sigs.add(sig)
+        self._member('wrong_year', year='3rd Year', sig='Robotics')
+        self._member('no_sig', year='2nd Year')
+
+        session = self._session(scope_type='SIG', target_years=['2nd'])
+        session.target_sigs.add(sig)
+        response = self.client.post(f'/api/attendance/sessions/{session.id}/populate/')
+        self.assertEqual(response.data, {'added': 2, 'total_eligible': 2})
+        self.assertEqual(set(session.records.values_list('user_id', flat=True)), {by_name.id, by_m2m.id})
+
+
+class SessionListTests(AttendanceTestCase):
+    def _session_with_records(self, statuses):
+        session = self._session()
+        for i, status in enumerate(statuses):
+            user = self._member(f's{session.id}_{i}')
+            AttendanceRecord.objects.create(session=session, user=user, status=status)
+        return session
+
+    def _results(self, response):
+        return response.data['results'] if isinstance(response.data, dict) else response.data
+
+    def test_list_reports_stats_per_session(self):
+        session = self._session_with_records(['PRESENT', 'PRESENT', 'EXCUSED', 'ABSENT'])
+        empty = self._session()
+        stats = {s['id']: s['stats'] for s in self._results(self.client.get('/api/attendance/sessions/'))}
+        self.assertEqual(stats[session.id], {'total': 4, 'present': 2, 'absent': 1, 'excused': 1})
+        self.assertEqual(stats[empty.id], {'total': 0, 'present': 0, 'absent': 0, 'excused': 0})
+        # Outside the list queryset the serializer aggregates on its own
+        retrieved = self.client.get(f'/api/attendance/sessions/{session.id}/').data['stats']
+        self.assertEqual(retrieved, stats[session.id])
+
+    def test_list_query_count_is_independent_of_session_count(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/attendance/sessions/')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx)
+
+        self._session_with_records(['PRESENT', 'ABSENT'])
+        few = count_queries()
+        for _ in range(10):
+            self._session_with_records(['PRESENT', 'EXCUSED'])
+        self.assertEqual(count_queries(), few)
+
+
+class RollupTests(AttendanceTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.alice = self._member('alice', year='2nd Year', sig='Robotics')
+        self.bob = self._member('bob', year='3rd Year')
+
+    def _finalized(self, statuses):
+        session = self._session(status='FINALIZED')
+        for user, status in statuses.items():
+            AttendanceRecord.objects.create(session=session, user=user, status=status)
+        return session
+
+    def _fresh(self, **kwargs):
+        cache.delete(ROLLUP_KEY)
+        return attendance_rollup(**kwargs)
+
+    def test_cached_rollup_matches_fresh_computation(self):
+        self._finalized({self.alice: 'PRESENT', self.bob: 'ABSENT'})
+        attendance_rollup()  # Warm the cache
+        self._finalized({self.alice: 'EXCUSED', self.bob: 'PRESENT'})
+        open_session = self._session(status='OPEN')
+        AttendanceRecord.objects.create(session=open_session, user=self.alice, status='PRESENT')
+
+        for group_by in ('user', 'sig', 'year', 'month'):
+            cached = attendance_rollup(group_by=group_by)
+            self.assertEqual(cached, self._fresh(group_by=group_by))
+        alice = next(r for r in attendance_rollup()['results'] if r['key'] == self.alice.id)
+        self.assertEqual((alice['total'], alice['present'], alice['excused']), (3, 2, 1))
+
+    def test_editing_a_finalized_session_invalidates_the_rollup(self):
+        session = self._finalized({self.alice: 'ABSENT', self.bob: 'ABSENT'})
+        attendance_rollup()
+        self.client.post(f'/api/attendance/sessions/{session.id}/batch_update/', {
+            'updates': [{'user_id': self.alice.id, 'status': 'PRESENT'}],
+        }, format='json')
+        rollup = attendance_rollup()
+        self.assertEqual(rollup, self._fresh())
+        alice = next(r for r in rollup['results'] if r['key'] == self.alice.id)
+        self.assertEqual(alice['present'], 1)
+
+    def test_reopened_session_drops_out_of_the_finalized_cells(self):
+        session = self._finalized({self.alice: 'PRESENT'})
+        attendance_rollup()
+        AttendanceSession.objects.filter(pk=session.pk).update(status='OPEN')
+        self.assertEqual(attendance_rollup(include_open=False)['results'], [])
@@ -1,16 +1,49 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Count, Exists, F, OuterRef
+from django.utils import timezone
+from collections import defaultdict
 from .models import AttendanceSession, AttendanceRecord
 from .serializers import AttendanceSessionSerializer, AttendanceRecordSerializer
+from .analytics import GROUPS, attendance_rollup, invalidate_rollup
 from users.permissions import GlobalPermission
-from users.models import User
+from core.exports import export_response, iter_rows
+from users.models import User, MemberProfile, parse_year_of_study
+
+POPULATE_CHUNK_SIZE = 1000
+
+RECORD_EXPORT_HEADERS = ['Session', 'Date', 'Username', 'Full Name', 'Roll Number', 'SIG', 'Year', 'Status', 'Marked At']
+
+def record_export_row(record):
+    user = record.user
+    profile = getattr(user, 'profile', None)
+    return [
+        record.session.title,
+        record.session.date.strftime("%Y-%m-%d"),
+        user.username,
+        profile.full_name if profile else '',
+        profile.roll_number if profile else '',
+        profile.sig if profile else '',
+        profile.year if profile else '',
+        record.status,
+        record.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    ]
 
 class AttendanceSessionViewSet(viewsets.ModelViewSet):
     queryset = AttendanceSession.objects.all().order_by('-date')
     serializer_class = AttendanceSessionSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        # Stats for every listed session in the same query (see AttendanceSessionSerializer.get_stats)
+        return super().get_queryset().annotate(
+            stats_total=Count('records'),
+            stats_present=Count('records', filter=Q(records__status='PRESENT')),
+            stats_excused=Count('records', filter=Q(records__status='EXCUSED')),
+        ).prefetch_related('target_sigs')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -20,52 +53,57 @@ class AttendanceSessionViewSet(viewsets.ModelViewSet):
         """
         Generates/Regenerates AttendanceRecords based on the filters.
         Only valid if status is DRAFT or OPEN.
+        Inserted in chunks straight from the eligible id stream; existing
+        records are left alone by the (session, user) unique constraint.
         """
         session = self.get_object()
-        
-        # 1. Base Query
-        # Active users only? Maybe yes.
-        qs = User.objects.filter(is_active=True).select_related('profile')
+        eligible = self._eligible_users(session)
 
-        # 2. Filter by Year
-        if session.target_years:
-            # target_years is list of ints e.g. [2, 3]
-            # Profile year is a string "2nd Year", "3rd Year" or int field?
-            # MemberProfile.year is CharField ("2nd Year"). MemberProfile.year_of_joining is int.
-            # Usually strict parsing is hard. Let's assume frontend sends "2", "3" and we match against year string OR calculated year.
-            # Simplified: Let's rely on MemberProfile.year containing the digit.
-            q_years = Q()
-            for y in session.target_years:
-                q_years |= Q(profile__year__icontains=str(y))
-            qs = qs.filter(q_years)
-
-        # 3. Filter by SIG/Scope
-        if session.scope_type == 'SIG':
-            sig_names = list(session.target_sigs.values_list('name', flat=True))
-            if sig_names:
-                # Users who have this SIG as 'sig' field OR in 'sigs' M2M
-                qs = qs.filter(Q(profile__sig__in=sig_names) | Q(profile__sigs__name__in=sig_names)).distinct()
-        
-        # Exclude users who already have a record
-        existing_ids = session.records.values_list('user_id', flat=True)
-        users_to_add = qs.exclude(id__in=existing_ids)
-
-        new_records = []
-        for u in users_to_add:
-            new_records.append(AttendanceRecord(
+        before = session.records.count()
+        eligible_count = 0
+        chunk = []
+        for uid in eligible.values_list('id', flat=True).iterator(chunk_size=POPULATE_CHUNK_SIZE):
+            eligible_count += 1
+            chunk.append(AttendanceRecord(
                 session=session,
-                user=u,
+                user_id=uid,
                 status='ABSENT', # Default
                 marked_by=request.user
             ))
-        
-        AttendanceRecord.objects.bulk_create(new_records)
-        
+            if len(chunk) >= POPULATE_CHUNK_SIZE:
+                AttendanceRecord.objects.bulk_create(chunk, ignore_conflicts=True)
+                chunk = []
+        if chunk:
+            AttendanceRecord.objects.bulk_create(chunk, ignore_conflicts=True)
+
         return Response({
-            'added': len(new_records), 
-            'total_eligible': qs.count()
+            'added': session.records.count() - before, 
+            'total_eligible': eligible_count
         })
 
+    def _eligible_users(self, session):
+        # Active users only
+        qs = User.objects.filter(is_active=True)
+
+        # Filter by Year: target_years like [2, 3] or ["2nd"], matched on the indexed
+        # MemberProfile.year_of_study parsed from the free-text 'year'
+        if session.target_years:
+            years = {y for y in map(parse_year_of_study, session.target_years) if y is not None}
+            qs = qs.filter(profile__year_of_study__in=years)
+
+        # Filter by SIG/Scope: legacy 'sig' name OR membership in the 'sigs' M2M.
+        # EXISTS on the M2M table keeps one row per user (no DISTINCT needed).
+        if session.scope_type == 'SIG':
+            sigs = list(session.target_sigs.values_list('id', 'name'))
+            if sigs:
+                sig_ids = [sid for sid, _ in sigs]
+                sig_names = [name for _, name in sigs]
+                in_sigs = MemberProfile.sigs.through.objects.filter(
+                    memberprofile_id=OuterRef('profile__id'), sig_id__in=sig_ids
+                )
+                qs = qs.filter(Q(profile__sig__in=sig_names) | Exists(in_sigs))
+        return qs
+
     @action(detail=True, methods=['get'])
     def records(self, request, pk=None):
         """Get all records for a session"""
@@ -73,23 +111,64 @@ class AttendanceSessionViewSet(viewsets.ModelViewSet):
         records = session.records.select_related('user__profile').all().order_by('user__profile__full_name')
         return Response(AttendanceRecordSerializer(records, many=True).data)
 
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Streamed roster for one session (?output=csv|ndjson, ?gzip=1)"""
+        session = self.get_object()
+        records = session.records.select_related('user__profile').order_by('user__profile__full_name', 'id')
+        filename = f"attendance_{session.date:%Y-%m-%d}_{session.id}"
+        return export_response(request, RECORD_EXPORT_HEADERS, iter_rows(records, record_export_row), filename)
+
     @action(detail=True, methods=['post'])
     def batch_update(self, request, pk=None):
         """
         Update multiple records at once.
         Body: { "updates": [ {"user_id": 1, "status": "PRESENT"}, ... ] }
+        Applied as one UPDATE per distinct status inside a single transaction.
+        Returns per-row results; invalid rows are reported and skipped.
         """
         session = self.get_object()
         updates = request.data.get('updates', [])
-        
-        count = 0
+        valid_statuses = {code for code, _ in AttendanceRecord.STATUS_CHOICES}
+
+        results = []
+        latest = {} # user_id -> status (last entry wins for duplicates)
         for item in updates:
             uid = item.get('user_id')
             st = item.get('status')
-            if uid and st:
-                AttendanceRecord.objects.filter(session=session, user_id=uid).update(status=st, marked_by=request.user)
+            try:
+                uid = int(uid)
+            except (TypeError, ValueError):
+                results.append({'user_id': uid, 'ok': False, 'error': 'Invalid user_id'})
+                continue
+            if st not in valid_statuses:
+                results.append({'user_id': uid, 'ok': False, 'error': f'Invalid status {st!r}'})
+                continue
+            latest[uid] = st
+
+        by_status = defaultdict(list)
+        for uid, st in latest.items():
+            by_status[st].append(uid)
+
+        now = timezone.now()
+        with transaction.atomic():
+            existing = set(session.records.filter(user_id__in=latest.keys()).values_list('user_id', flat=True))
+            for st, uids in by_status.items():
+                AttendanceRecord.objects.filter(session=session, user_id__in=uids).update(
+                    status=st, marked_by=request.user, timestamp=now
+                )
+
+        if session.status == 'FINALIZED' and latest:
+            invalidate_rollup()
+
+        count = 0
+        for uid, st in latest.items():
+            if uid in existing:
+                results.append({'user_id': uid, 'ok': True, 'status': st})
                 count += 1
-        return Response({'updated': count})
+            else:
+                results.append({'user_id': uid, 'ok': False, 'error': 'Not on this session roster'})
+        return Response({'updated': count, 'results': results})
 
 class AttendanceRecordViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -98,10 +177,45 @@ class AttendanceRecordViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-session_date', '-id') # Latest sessions first
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        # The cursor reads its position off the row, so the session date is annotated
+        qs = super().get_queryset().annotate(session_date=F('session__date'))
         user_id = self.request.query_params.get('user_id')
         if user_id:
             qs = qs.filter(user_id=user_id)
-        return qs.order_by('-session__date')
+        return qs.order_by('-session_date', '-id')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Streamed history, same filters as the list (?user_id=)"""
+        records = self.get_queryset().select_related('session', 'user__profile').order_by('-session__date', 'id')
+        return export_response(request, RECORD_EXPORT_HEADERS, iter_rows(records, record_export_row), 'attendance_records')
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Attendance rollups computed in the database.
+        Query: group_by=user|sig|year|month, user_id, sig, year,
+               from=YYYY-MM, to=YYYY-MM, include_open=0 to count FINALIZED sessions only.
+        """
+        params = request.query_params
+        group_by = params.get('group_by', 'user')
+        if group_by not in GROUPS:
+            return Response({'error': f"group_by must be one of {', '.join(GROUPS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            user_id = int(params['user_id']) if params.get('user_id') else None
+            year = int(params['year']) if params.get('year') else None
+        except ValueError:
+            return Response({'error': 'user_id and year must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(attendance_rollup(
+            group_by=group_by,
+            include_open=params.get('include_open', '1') not in ('0', 'false'),
+            user_id=user_id,
+            sig=params.get('sig'),
+            year=year,
+            month_from=params.get('from'),
+            month_to=params.get('to'),
+        ))
@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through this entry point (e.g. ``gunicorn -k uvicorn.workers.UvicornWorker
+config.asgi:application``) to enable server push: the project event stream at
+/api/projects/<id>/events/ (see projects.realtime) only works under ASGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -201,8 +201,108 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Cursor (keyset) pagination everywhere; lookup lists opt out per viewset
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.DefaultCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# ======================
+# CACHES
+# ======================
+
+# CACHE_BACKEND picks where every named cache lives:
+#   locmem - per process (default; fine for a single worker and for tests)
+#   file   - files under CACHE_DIR, shared by all workers on one host
+#   db     - tables in the main database (run `manage.py createcachetable`)
+#   or a full backend path plus CACHE_LOCATION for an external cache server
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_DIR = config('CACHE_DIR', default=str(BASE_DIR / 'cache'))
+CACHE_LOCATION = config('CACHE_LOCATION', default='')
+
+_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+
+def _cache(name, timeout=300, max_entries=1000):
+    backend = _CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND)
+    if CACHE_BACKEND == 'file':
+        location = os.path.join(CACHE_DIR, name)
+    elif CACHE_BACKEND == 'db':
+        location = f'cache_{name}'
+    elif CACHE_BACKEND == 'locmem':
+        location = name
+    else:
+        location = CACHE_LOCATION
+    return {
+        'BACKEND': backend,
+        'LOCATION': location,
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': name, # Keeps the caches apart when they share one server
+        'OPTIONS': {'MAX_ENTRIES': max_entries} if CACHE_BACKEND in _CACHE_BACKENDS else {},
+    }
+
+CACHES = {
+    'default': _cache('default'),
+    # Typing / online indicators (projects.presence) and CacheBroker events (projects.realtime)
+    'presence': _cache('presence', timeout=60, max_entries=5000),
+    # Rendered public responses and the team directory (core.caching, users.team_directory)
+    'responses': _cache('responses', max_entries=5000),
+    # Resolved capability flags per user (users.capabilities); only used when
+    # shared, a locmem copy could not be invalidated in the other workers
+    'permissions': _cache('permissions', timeout=600, max_entries=10000),
+    # Unsaved quiz answers (quizzes.autosave); sized so entries are never culled
+    'autosave': _cache('autosave', timeout=60 * 60 * 6, max_entries=50000),
+    # Compiled answer keys and rendered papers (quizzes.answer_key, quizzes.paper),
+    # keyed on Quiz.content_version
+    'quizzes': _cache('quizzes', timeout=60 * 60 * 24),
+}
+
+# ======================
+# REALTIME
+# ======================
+
+# Pub/sub behind the project event stream (projects.realtime). The in-process
+# broker only reaches connections on the same worker, so a shared cache
+# switches to CacheBroker.
+REALTIME_BROKER = config(
+    'REALTIME_BROKER',
+    default='projects.realtime.InProcessBroker' if CACHE_BACKEND == 'locmem' else 'projects.realtime.CacheBroker',
+)
+
+# ======================
+# QUIZ AUTOSAVE
+# ======================
+
+# Coalesce answer saves in the 'autosave' cache and write each attempt at most
+# every QUIZ_AUTOSAVE_FLUSH_SECONDS (and at submit). Needs a shared cache.
+QUIZ_AUTOSAVE_BUFFERED = config('QUIZ_AUTOSAVE_BUFFERED', default=CACHE_BACKEND != 'locmem', cast=bool)
+QUIZ_AUTOSAVE_FLUSH_SECONDS = 30
+
+# ======================
+# AUDIT LOG
+# ======================
+
+# users.audit buffers AuditLog rows and bulk-inserts them from a background thread.
+# Sync mode writes each event immediately; core.test_runner turns it on for the test suite.
+AUDIT_LOG_SYNC = config('AUDIT_LOG_SYNC', default=False, cast=bool)
+AUDIT_LOG_BATCH_SIZE = 100
+AUDIT_LOG_FLUSH_INTERVAL = 2.0 # seconds
+AUDIT_LOG_MAX_QUEUE = 10000
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Days to keep each event_type ('default' covers the rest, None = forever),
+# enforced by `manage.py apply_audit_retention`
+AUDIT_LOG_RETENTION_DAYS = {
+    'default': 365,
+    'USER_LOGIN': 90,
+    'USER_LOGOUT': 90,
+}
+# Expired rows are appended to gzip'd NDJSON here before deletion (empty = no archive)
+AUDIT_LOG_ARCHIVE_DIR = config('AUDIT_LOG_ARCHIVE_DIR', default='')
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -0,0 +1,233 @@
+"""
+Response cache for anonymous reads of the public viewsets.
+
+Every model a cached view depends on has a version number in the cache,
+bumped by the save/delete/m2m signals below (and by hand after queryset
+.update() calls, which send no signals). A rendered response is stored
+under its path, the query parameters it depends on and the current
+versions, so a write to any of those models makes the old entries
+unreachable instead of having to find and delete them. A bump only reaches
+the cache it runs against; with a per-process cache another worker keeps
+serving its own entries, so they live for LOCAL_RESPONSE_CACHE_TIMEOUT only.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.connection import ConnectionProxy
+
+cache = ConnectionProxy(caches, 'responses')
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+PUBLIC_MAX_AGE = 30
+# No staler than what a browser may already hold under max-age
+LOCAL_RESPONSE_CACHE_TIMEOUT = PUBLIC_MAX_AGE
+# Every model some PublicResponseCacheMixin view lists in cache_models. Only
+# writes to these bump a version; the rest (quiz autosave, chat messages,
+# attendance marking...) skip the cache round trip entirely.
+VERSIONED_MODELS = frozenset({
+    'core.announcement', 'core.form', 'core.formfield', 'core.formresponse', 'core.formsection',
+    'core.galleryimage', 'core.sponsorship',
+    'events.event',
+    'projects.project',
+    'quizzes.option', 'quizzes.question', 'quizzes.quiz',
+    'users.memberprofile', 'users.sig', 'users.teamposition', 'users.user',
+})
+
+
+def _version_key(label):
+    return f"model_version:{label.lower()}"
+
+
+def model_versions(labels):
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    missing = {k: int(time.time() * 1000) for k in keys if k not in versions}
+    if missing:
+        # Seeded from the clock so a lost counter never reuses an old version
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[k] for k in keys]
+
+
+def bump_model_version(model):
+    label = model if isinstance(model, str) else model._meta.label_lower
+    key = _version_key(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def _is_versioned(model):
+    return model._meta.label_lower in VERSIONED_MODELS
+
+
+# Connected for every sender (core.apps imports this module), so writes made
+# outside the web process (shell, management commands) are seen too
+@receiver([post_save, post_delete])
+def _bump_on_write(sender, update_fields=None, **kwargs):
+    if not _is_versioned(sender):
+        return
+    # Logins save last_login and nothing else
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    _safe_bump(sender)
+
+
+@receiver(m2m_changed)
+def _bump_on_m2m(sender, instance, action, model, **kwargs):
+    if action.startswith('post_'):
+        for changed in (type(instance), model):
+            if _is_versioned(changed):
+                _safe_bump(changed)
+
+
+def _safe_bump(model):
+    # A cache outage (or the cache table not existing yet during migrate)
+    # must never fail the write itself
+    try:
+        bump_model_version(model)
+    except Exception:
+        logger.warning("Could not bump cache version for %s", model._meta.label, exc_info=True)
+
+
+class PublicResponseCacheMixin:
+    """
+    Caches list/retrieve responses for anonymous GETs and answers
+    If-None-Match with 304. ``cache_models`` lists (as 'app.Model' labels,
+    each also in VERSIONED_MODELS) everything the response is built from;
+    ``public_cache_params`` lists every query parameter the response depends
+    on, and only those go into the cache key.
+    """
+    cache_models = ()
+    public_cache_actions = ('list', 'retrieve')
+    public_cache_params = ('cursor', 'page_size', 'expand', 'format')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        unversioned = [label for label in cls.cache_models if label.lower() not in VERSIONED_MODELS]
+        if unversioned:
+            raise ImproperlyConfigured(
+                f"{cls.__name__}.cache_models has models missing from VERSIONED_MODELS: {', '.join(unversioned)}"
+            )
+
+    def _public_cacheable(self, request):
+        # Runs inside the handler, so authentication has already happened
+        return (
+            request.method == 'GET'
+            and bool(self.cache_models)
+            and self.action in self.public_cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def _public_cache_key(self, request):
+        params = sorted(
+            (name, value)
+            for name in self.public_cache_params
+            for value in request.query_params.getlist(name)
+        )
+        raw = '|'.join([
+            request.path,
+            urlencode(params),
+            request.META.get('HTTP_ACCEPT', ''),
+            ','.join(map(str, model_versions(self.cache_models))),
+        ])
+        return 'public_response:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        return self._public_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._public_response(super().retrieve, request, *args, **kwargs)
+
+    def _public_response(self, handler, request, *args, **kwargs):
+        if not self._public_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        key = self._public_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render'):
+                # Normally done by finalize_response; needed now to store the bytes
+                response.accepted_renderer = request.accepted_renderer
+                response.accepted_media_type = request.accepted_media_type
+                response.renderer_context = self.get_renderer_context()
+                response.render()
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+            }
+            timeout = RESPONSE_CACHE_TIMEOUT if is_shared_cache('responses') else LOCAL_RESPONSE_CACHE_TIMEOUT
+            cache.set(key, cached, timeout)
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == cached['etag']:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(cached['content'], content_type=cached['content_type'])
+        response['ETag'] = cached['etag']
+        response['Cache-Control'] = f'public, max-age={PUBLIC_MAX_AGE}'
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+def is_shared_cache(alias):
+    """
+    False for a per-process cache (locmem): an invalidation made by one
+    worker never reaches the others, so nothing that must be revoked
+    promptly may be kept there across requests.
+    """
+    from django.core.cache.backends.locmem import LocMemCache
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def _entry_count(backend):
+    from django.core.cache.backends.db import DatabaseCache
+    from django.core.cache.backends.filebased import FileBasedCache
+    from django.core.cache.backends.locmem import LocMemCache
+    from django.db import connection
+
+    if isinstance(backend, LocMemCache):
+        return len(backend._cache)
+    if isinstance(backend, FileBasedCache):
+        return len(backend._list_cache_files())
+    if isinstance(backend, DatabaseCache):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(backend._table)}")
+            return cursor.fetchone()[0]
+    return None # Not cheaply known for external backends
+
+
+def cache_health():
+    """Round-trip check and size of every configured cache."""
+    report = {}
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        entry = {'backend': type(backend).__name__}
+        key = f"health:{uuid.uuid4().hex}"
+        started = time.perf_counter()
+        try:
+            backend.set(key, 1, 10)
+            entry['ok'] = backend.get(key) == 1
+            backend.delete(key)
+            entry['entries'] = _entry_count(backend)
+        except Exception as e:
+            entry['ok'] = False
+            entry['error'] = str(e)
+        entry['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        report[alias] = entry
+    return report
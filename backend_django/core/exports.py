@@ -0,0 +1,100 @@
+"""
+Streaming exports shared by the audit, user, form-response and attendance views.
+
+Rows are pulled from the database with ``iterator()`` and written out as they
+are produced, so memory stays flat regardless of table size and the first
+bytes reach the client before the query has finished.
+
+Query params understood by ``export_response``:
+    output=csv|ndjson   (default csv)
+    gzip=1              compress the stream (file gets a .gz suffix)
+"""
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, row, chunk_size=EXPORT_CHUNK_SIZE):
+    """Map ``row(obj)`` over a queryset fetched in chunks."""
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield row(obj)
+
+
+def _csv_lines(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for r in rows:
+        yield writer.writerow(r)
+
+
+def _ndjson_lines(headers, rows):
+    for r in rows:
+        yield json.dumps(dict(zip(headers, r)), cls=DjangoJSONEncoder) + '\n'
+
+
+def _buffered(lines):
+    # Yield fewer, larger chunks rather than one tiny write per row
+    buf, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buf.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b''.join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b''.join(buf)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_export(headers, rows, filename, output='csv', gzip=False):
+    """
+    Build a StreamingHttpResponse for ``rows`` (an iterable of sequences
+    matching ``headers``). ``filename`` is given without extension.
+    """
+    lines = _ndjson_lines(headers, rows) if output == 'ndjson' else _csv_lines(headers, rows)
+    chunks = _buffered(lines)
+    filename = f"{filename}.{output}"
+    content_type = FORMATS[output]
+    if gzip:
+        chunks = _gzipped(chunks)
+        filename += '.gz'
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(request, headers, rows, filename):
+    """stream_export with the format picked from the request's query params."""
+    output = request.query_params.get('output', 'csv')
+    if output not in FORMATS:
+        output = 'csv'
+    gzip = request.query_params.get('gzip') in ('1', 'true')
+    return stream_export(headers, rows, filename, output=output, gzip=gzip)
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Keyset pagination applied to every list endpoint (see REST_FRAMEWORK settings).
+
+    Contract for viewsets:
+    - ``cursor_ordering`` picks the indexed column(s) to page on when the model has
+      no ``created_at`` or the endpoint sorts differently (first field must be on the model
+      or annotated by ``get_queryset``).
+    - Small lookup lists opt out with ``pagination_class = None`` and keep returning arrays.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from users.serializers import UserSerializer
+from users.serializers import NestedUserSerializer
 from .models import (
     Announcement, GalleryImage, Sponsorship, ContactMessage, 
     Form, FormSection, FormField, FormResponse
@@ -46,7 +46,7 @@ class FormSectionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class FormResponseSerializer(serializers.ModelSerializer):
-    user_details = UserSerializer(source='user', read_only=True)
+    user_details = NestedUserSerializer(source='user', read_only=True)
     class Meta:
         model = FormResponse
         fields = '__all__'
@@ -56,7 +56,7 @@ class FormSerializer(serializers.ModelSerializer):
     sections = FormSectionSerializer(many=True, read_only=True)
     fields = FormFieldSerializer(many=True, read_only=True)
     response_count = serializers.IntegerField(source='responses.count', read_only=True)
-    created_by_details = UserSerializer(source='created_by', read_only=True)
+    created_by_details = NestedUserSerializer(source='created_by', read_only=True)
 
     class Meta:
         model = Form
@@ -0,0 +1,15 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with audit events written synchronously, so tests can assert on them."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._sync_audit = override_settings(AUDIT_LOG_SYNC=True)
+        self._sync_audit.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._sync_audit.disable()
+        super().teardown_test_environment(**kwargs)
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     AnnouncementViewSet, GalleryViewSet, SponsorshipViewSet, 
     ContactMessageViewSet, FormViewSet, FormSectionViewSet, 
-    FormFieldViewSet, FormResponseViewSet
+    FormFieldViewSet, FormResponseViewSet, CacheHealthView
 )
 
 router = DefaultRouter()
@@ -18,4 +18,5 @@ router.register(r'form-responses', FormResponseViewSet, basename='form-responses
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('cache/health/', CacheHealthView.as_view(), name='cache_health'),
 ]
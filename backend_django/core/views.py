@@ -1,9 +1,11 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
 from django.utils import timezone
-from django.http import HttpResponse
-import csv
+from .exports import export_response, iter_rows
+from .caching import PublicResponseCacheMixin, cache_health
 from .models import (
     Announcement, GalleryImage, Sponsorship, ContactMessage, 
     Form, FormSection, FormField, FormResponse
@@ -14,8 +16,10 @@ from .serializers import (
     FormFieldSerializer, FormResponseSerializer
 )
 from users.permissions import GlobalPermission
+from users.capabilities import has_capability
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.Announcement',)
     queryset = Announcement.objects.all().order_by('-created_at')
     serializer_class = AnnouncementSerializer
     permission_classes = [GlobalPermission]
@@ -27,9 +31,12 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         ann.save()
         return Response({'status': 'published'})
 
-class GalleryViewSet(viewsets.ModelViewSet):
+class GalleryViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.GalleryImage', 'events.Event')
+    public_cache_params = PublicResponseCacheMixin.public_cache_params + ('event',)
     permission_classes = [GlobalPermission]
     serializer_class = GalleryImageSerializer
+    cursor_ordering = ('-uploaded_at', '-id')
 
     def get_queryset(self):
         qs = GalleryImage.objects.all().order_by('-uploaded_at')
@@ -67,7 +74,8 @@ class GalleryViewSet(viewsets.ModelViewSet):
     def image(self, request, pk=None):
         return self.destroy(request, pk)
 
-class SponsorshipViewSet(viewsets.ModelViewSet):
+class SponsorshipViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.Sponsorship',)
     queryset = Sponsorship.objects.all().order_by('-created_at')
     serializer_class = SponsorshipSerializer
     permission_classes = [GlobalPermission]
@@ -79,7 +87,8 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
 
 # --- DYNAMIC FORMS ---
 
-class FormViewSet(viewsets.ModelViewSet):
+class FormViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.Form', 'core.FormSection', 'core.FormField', 'core.FormResponse', 'users.User', 'users.MemberProfile')
     queryset = Form.objects.all().order_by('-created_at')
     serializer_class = FormSerializer
     permission_classes = [GlobalPermission]
@@ -96,20 +105,10 @@ class FormViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def export_responses_csv(self, request, pk=None):
         form = self.get_object()
-        responses = form.responses.all().order_by('-submitted_at')
-        fields = form.fields.all().order_by('order')
-        
-        response = HttpResponse(content_type='text/csv')
-        filename = f"{form.title.replace(' ', '_')}_responses.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        writer = csv.writer(response)
-        
-        # Headers
-        headers = ['Response ID', 'User', 'Submitted At'] + [f.label for f in fields]
-        writer.writerow(headers)
+        responses = form.responses.select_related('user').order_by('-submitted_at', '-id')
+        labels = list(form.fields.order_by('order').values_list('label', flat=True))
 
-        for resp in responses:
+        def row(resp):
             user_str = resp.user.username if resp.user else 'Anonymous'
             row = [
                 resp.id, 
@@ -119,29 +118,35 @@ class FormViewSet(viewsets.ModelViewSet):
             
             # Map data
             data = resp.data or {}
-            for field in fields:
-                val = data.get(field.label, '')
+            for label in labels:
+                val = data.get(label, '')
                 if isinstance(val, list): val = ", ".join(map(str, val))
                 row.append(str(val))
-            
-            writer.writerow(row)
-            
-        return response
+            return row
 
-class FormSectionViewSet(viewsets.ModelViewSet):
+        headers = ['Response ID', 'User', 'Submitted At'] + labels
+        filename = f"{form.title.replace(' ', '_')}_responses"
+        return export_response(request, headers, iter_rows(responses, row), filename)
+
+class FormSectionViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.FormSection', 'core.FormField')
     queryset = FormSection.objects.all()
     serializer_class = FormSectionSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Edited inline inside a form
 
-class FormFieldViewSet(viewsets.ModelViewSet):
+class FormFieldViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('core.FormField',)
     queryset = FormField.objects.all()
     serializer_class = FormFieldSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Edited inline inside a form
 
 class FormResponseViewSet(viewsets.ModelViewSet):
     queryset = FormResponse.objects.all()
     serializer_class = FormResponseSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-submitted_at', '-id')
 
     def create(self, request, *args, **kwargs):
         form_id = request.data.get('form')
@@ -185,3 +190,18 @@ class FormResponseViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user if self.request.user.is_authenticated else None)
+
+class CacheHealthView(APIView):
+    """Round-trip status and entry counts of every configured cache (ops dashboard)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not (request.user.is_superuser or has_capability(request.user, 'can_manage_security')):
+            return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
+        report = cache_health()
+        healthy = all(c['ok'] for c in report.values())
+        return Response({
+            'status': 'ok' if healthy else 'degraded',
+            'backend': settings.CACHE_BACKEND,
+            'caches': report,
+        }, status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE)
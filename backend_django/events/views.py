@@ -2,11 +2,14 @@ from rest_framework import viewsets, permissions
 from .models import Event
 from .serializers import EventSerializer
 from users.permissions import GlobalPermission
+from core.caching import PublicResponseCacheMixin
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('events.Event', 'users.User', 'users.MemberProfile')
     queryset = Event.objects.all().order_by('-date')
     serializer_class = EventSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-date', '-id')
 
     def get_queryset(self):
         from django.db.models import Q
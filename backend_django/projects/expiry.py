@@ -0,0 +1,75 @@
+"""
+Expiry of messages in ephemeral threads, run out of band by
+``manage.py purge_ephemeral_messages`` so chat sends never pay for it.
+The same sweep drops delta tombstones past their retention.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import EphemeralPurgeRun, ProjectThread, ThreadMessage
+from .tombstones import purge_tombstones, record_removed
+
+logger = logging.getLogger(__name__)
+
+# Run history older than this is dropped by the sweep itself
+RUN_RETENTION = timedelta(days=30)
+DEFAULT_BATCH_SIZE = 500
+
+
+def purge_thread(thread, now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete a thread's expired messages in bounded chunks (oldest first). Returns rows deleted."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=thread.ephemeral_ttl_minutes)
+    expired = ThreadMessage.objects.filter(thread=thread, created_at__lt=cutoff)
+
+    purged = 0
+    while True:
+        # Served by the (thread, created_at) index
+        ids = list(expired.order_by('created_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            record_removed(thread.project_id, 'MESSAGE', ids)
+            purged += ThreadMessage.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            break
+    return purged
+
+
+def purge_expired_messages(batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """One sweep over every ephemeral thread. Records the run in EphemeralPurgeRun and returns its metrics."""
+    now = now or timezone.now()
+    started = timezone.now()
+    threads = purged = 0
+    for thread in ProjectThread.objects.filter(is_ephemeral=True).only('id', 'project_id', 'ephemeral_ttl_minutes'):
+        threads += 1
+        purged += purge_thread(thread, now=now, batch_size=batch_size)
+    tombstones = purge_tombstones(now)
+
+    run = EphemeralPurgeRun.objects.create(
+        started_at=started,
+        threads_scanned=threads,
+        rows_purged=purged,
+        tombstones_purged=tombstones,
+        duration_ms=int((timezone.now() - started).total_seconds() * 1000),
+    )
+    EphemeralPurgeRun.objects.filter(started_at__lt=now - RUN_RETENTION).delete()
+    logger.info(
+        "Ephemeral purge removed %s messages from %s threads and %s tombstones in %sms",
+        purged, threads, tombstones, run.duration_ms,
+    )
+
+    totals = EphemeralPurgeRun.objects.aggregate(runs=Count('id'), rows_purged_total=Sum('rows_purged'))
+    return {
+        'runs': totals['runs'],
+        'rows_purged_total': totals['rows_purged_total'] or 0,
+        'last_run_at': started.isoformat(),
+        'last_threads_scanned': threads,
+        'last_rows_purged': purged,
+        'last_tombstones_purged': tombstones,
+        'last_duration_ms': run.duration_ms,
+    }
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.expiry import DEFAULT_BATCH_SIZE, purge_expired_messages
+
+
+class Command(BaseCommand):
+    help = "Delete expired messages from ephemeral project threads (run from cron, or with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Rows deleted per DELETE statement")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running, sweeping every --interval seconds")
+        parser.add_argument('--interval', type=int, default=60,
+                            help="Seconds between sweeps in --loop mode")
+
+    def handle(self, *args, **options):
+        while True:
+            stats = purge_expired_messages(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Purged {stats['last_rows_purged']} messages from "
+                f"{stats['last_threads_scanned']} ephemeral threads "
+                f"in {stats['last_duration_ms']}ms "
+                f"(total {stats['rows_purged_total']} over the last {stats['runs']} runs)"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
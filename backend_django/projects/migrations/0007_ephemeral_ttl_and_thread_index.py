@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_task_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectthread',
+            name='ephemeral_ttl_minutes',
+            field=models.PositiveIntegerField(default=60, help_text='Lifetime of messages in an ephemeral thread'),
+        ),
+        migrations.AddIndex(
+            model_name='threadmessage',
+            index=models.Index(fields=['thread', 'created_at'], name='threadmsg_thread_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_project_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EphemeralPurgeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('threads_scanned', models.PositiveIntegerField(default=0)),
+                ('rows_purged', models.PositiveIntegerField(default=0)),
+                ('tombstones_purged', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 
 class Project(models.Model):
@@ -55,6 +56,13 @@ class Task(models.Model):
     due_date = models.DateField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Delta sync: "tasks of this project changed since T"
+            models.Index(fields=['project', 'updated_at'], name='task_project_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.project.title}"
@@ -88,6 +96,7 @@ class ProjectThread(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='threads')
     title = models.CharField(max_length=200)
     is_ephemeral = models.BooleanField(default=False, help_text="If true, messages self-destruct after delivery/time")
+    ephemeral_ttl_minutes = models.PositiveIntegerField(default=60, help_text="Lifetime of messages in an ephemeral thread")
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -102,3 +111,51 @@ class ThreadMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Ephemeral expiry scans "messages of thread X older than T"
+            models.Index(fields=['thread', 'created_at'], name='threadmsg_thread_created_idx'),
+        ]
+
+class ProjectTombstone(models.Model):
+    """A message, task or member removed from a project, kept so delta syncs can drop it."""
+    KIND_CHOICES = [
+        ('MESSAGE', 'Message'),
+        ('TASK', 'Task'),
+        ('MEMBER', 'Member'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'deleted_at'], name='tombstone_project_deleted_idx'),
+            # Retention sweep
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+
+class EphemeralPurgeRun(models.Model):
+    """One sweep of ``purge_ephemeral_messages``, kept so run metrics outlive the cron process."""
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    threads_scanned = models.PositiveIntegerField(default=0)
+    rows_purged = models.PositiveIntegerField(default=0)
+    tombstones_purged = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+
+class StreamTicket(models.Model):
+    """
+    Single-use credential for opening a project's event stream. EventSource
+    cannot send the Authorization header, so the client trades its JWT for a
+    ticket and puts that in the stream URL instead of the token itself.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stream_tickets')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='stream_tickets')
+    expires_at = models.DateTimeField(db_index=True)
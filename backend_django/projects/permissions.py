@@ -17,15 +17,27 @@ class IsProjectMember(permissions.BasePermission):
             
         # If obj is Project
         if hasattr(obj, 'members'):
-            return request.user == obj.lead or request.user in obj.members.all()
+            return self._is_member(request.user, obj)
             
         # If obj is ProjectThread
         if hasattr(obj, 'project'):
-            return request.user == obj.project.lead or request.user in obj.project.members.all()
+            return self._is_member(request.user, obj.project)
 
         # If obj is ThreadMessage
         if hasattr(obj, 'thread'):
-            project = obj.thread.project
-            return request.user == project.lead or request.user in project.members.all()
+            return self._is_member(request.user, obj.thread.project)
 
         return False
+
+    def _is_member(self, user, project):
+        return is_project_member(user, project)
+
+
+def is_project_member(user, project):
+    """Lead, member or superuser. Anonymous users never are (their id is None, like a missing lead)."""
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    # Single EXISTS instead of loading every member
+    return project.lead_id == user.id or project.members.filter(id=user.id).exists()
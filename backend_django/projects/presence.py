@@ -0,0 +1,60 @@
+"""
+Per-thread presence kept in a single cache entry:
+
+    presence:<thread_id> -> { user_id: {'username': str, 'seen': ts, 'typing': ts} }
+
+Reading who is typing / online is one cache round-trip with no DB access.
+Writes are read-modify-write; a lost update only hides a typing dot until
+the next signal, which arrives every couple of seconds anyway.
+"""
+import time
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+cache = ConnectionProxy(caches, 'presence')
+
+TYPING_TTL = 4       # seconds a typing signal stays visible
+VIEWER_TTL = 10      # seconds a viewer counts as online after their last poll
+
+
+def _key(thread_id):
+    return f"presence:{thread_id}"
+
+
+def _live(entries, now):
+    return {uid: e for uid, e in entries.items() if now - e['seen'] < VIEWER_TTL}
+
+
+def touch(thread_id, user, typing=False):
+    """Record that ``user`` is viewing (and optionally typing in) the thread."""
+    now = time.time()
+    key = _key(thread_id)
+    entries = _live(cache.get(key) or {}, now)
+    entry = entries.get(user.id) or {'username': user.username, 'typing': 0}
+    entry['seen'] = now
+    if typing:
+        entry['typing'] = now
+    entries[user.id] = entry
+    cache.set(key, entries, VIEWER_TTL)
+    return entries
+
+
+def status(thread_id, viewer):
+    """
+    Active typers (excluding ``viewer``) and the number of online viewers.
+    The viewer's own heartbeat is only rewritten once it is half stale,
+    so steady polling costs a single cache read.
+    """
+    now = time.time()
+    entries = _live(cache.get(_key(thread_id)) or {}, now)
+    own = entries.get(viewer.id)
+    if own is None or now - own['seen'] > VIEWER_TTL / 2:
+        entries = touch(thread_id, viewer)
+
+    typers = [
+        {'id': uid, 'username': e['username']}
+        for uid, e in entries.items()
+        if uid != viewer.id and now - e['typing'] < TYPING_TTL
+    ]
+    return {'typers': typers, 'viewers_online': len(entries)}
@@ -0,0 +1,205 @@
+"""
+Server push for project chat (served over ASGI, see config/asgi.py).
+
+Publishers (signals, views) call ``get_broker().publish('project:<id>', event)``;
+the SSE view in projects.views subscribes one queue per open connection.
+InProcessBroker fans out inside a single process; it is the default with the
+locmem cache and what tests use. CacheBroker goes through the 'presence'
+cache so it reaches every worker; settings.REALTIME_BROKER selects it when
+CACHE_BACKEND is shared. Clients still poll ProjectViewSet.delta slowly while
+the stream is open, so an event lost between reconnects is picked up anyway.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+def project_channel(project_id):
+    return f"project:{project_id}"
+
+
+class Subscription:
+    """A bounded event queue bound to the event loop of the connection that opened it."""
+
+    def __init__(self, broker, channel, loop, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(event)
+        else:
+            # Published from a sync view / signal running in a worker thread
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        # Slow consumers lose the oldest events rather than blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Thread-safe pub/sub within one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel, maxsize=100):
+        sub = Subscription(self, channel, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        delivered = 0
+        for sub in subs:
+            try:
+                sub.deliver(event)
+                delivered += 1
+            except RuntimeError:
+                # The subscriber's loop is gone (connection torn down)
+                self.unsubscribe(sub)
+        return delivered
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class CacheSubscription:
+    """Reads a channel's numbered events from the shared cache, starting after the last one published."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.last = None
+        self.pending = deque()
+        self.listening_at = 0
+
+    async def get(self, timeout=None):
+        cache = self.broker.cache
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while not self.pending:
+            if time.monotonic() - self.listening_at > self.broker.LISTENING_REFRESH:
+                await cache.aset(self.broker.listening_key(self.channel), True, self.broker.LISTENING_TTL)
+                self.listening_at = time.monotonic()
+            seq = await cache.aget(self.broker.seq_key(self.channel)) or 0
+            if self.last is None or seq < self.last:
+                # First read, or the counter was evicted and restarted
+                self.last = seq
+            elif seq > self.last:
+                first = max(self.last + 1, seq - self.broker.MAX_BACKLOG + 1)
+                keys = [self.broker.event_key(self.channel, n) for n in range(first, seq + 1)]
+                found = await cache.aget_many(keys)
+                # Events that already expired are skipped; the client's delta poll covers them
+                self.pending.extend(found[key] for key in keys if key in found)
+                self.last = seq
+                continue
+            if deadline is not None and loop.time() >= deadline:
+                raise asyncio.TimeoutError
+            await asyncio.sleep(self.broker.POLL_INTERVAL)
+        return self.pending.popleft()
+
+    def close(self):
+        # The listening flag expires on its own once no subscription refreshes it
+        pass
+
+
+class CacheBroker:
+    """
+    Pub/sub across workers through the shared 'presence' cache. Publishing
+    bumps a per-channel counter and stores the event under its number;
+    subscribers poll the counter every POLL_INTERVAL. Open subscriptions keep
+    a short-lived "listening" flag per channel instead of a count, so a
+    worker that dies without unsubscribing cannot leave it set.
+    """
+    POLL_INTERVAL = 1.0
+    EVENT_TTL = 60
+    MAX_BACKLOG = 100
+    LISTENING_TTL = 30
+    LISTENING_REFRESH = 10
+
+    def __init__(self, alias='presence'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def seq_key(self, channel):
+        return f"rt:{channel}:seq"
+
+    def event_key(self, channel, seq):
+        return f"rt:{channel}:{seq}"
+
+    def listening_key(self, channel):
+        return f"rt:{channel}:listening"
+
+    def subscribe(self, channel, maxsize=100):
+        return CacheSubscription(self, channel)
+
+    def publish(self, channel, event):
+        key = self.seq_key(channel)
+        self.cache.add(key, 0, None)
+        try:
+            seq = self.cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr; subscribers resync on the restarted counter
+            self.cache.set(key, 1, None)
+            seq = 1
+        self.cache.set(self.event_key(channel, seq), event, self.EVENT_TTL)
+        return seq
+
+    def subscriber_count(self, channel):
+        """1 while some worker has a subscription open on the channel, else 0."""
+        return 1 if self.cache.get(self.listening_key(channel)) else 0
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'REALTIME_BROKER', 'projects.realtime.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_project_event(project_id, event):
+    return get_broker().publish(project_channel(project_id), event)
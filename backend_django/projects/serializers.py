@@ -1,9 +1,9 @@
 from rest_framework import serializers
-from users.serializers import UserSerializer
+from users.serializers import NestedUserSerializer
 from .models import Project, Task, TaskComment, ProjectRequest, ProjectThread, ThreadMessage
 
 class ThreadMessageSerializer(serializers.ModelSerializer):
-    author_details = UserSerializer(source='author', read_only=True)
+    author_details = NestedUserSerializer(source='author', read_only=True)
     class Meta:
         model = ThreadMessage
         fields = '__all__'
@@ -11,13 +11,13 @@ class ThreadMessageSerializer(serializers.ModelSerializer):
 
 class ProjectThreadSerializer(serializers.ModelSerializer):
     messages = ThreadMessageSerializer(many=True, read_only=True)
-    created_by_details = UserSerializer(source='created_by', read_only=True)
+    created_by_details = NestedUserSerializer(source='created_by', read_only=True)
     class Meta:
         model = ProjectThread
         fields = '__all__'
 
 class ProjectRequestSerializer(serializers.ModelSerializer):
-    user_details = UserSerializer(source='user', read_only=True)
+    user_details = NestedUserSerializer(source='user', read_only=True)
     user_position = serializers.CharField(source='user.profile.position', read_only=True)
     class Meta:
         model = ProjectRequest
@@ -32,16 +32,23 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['author']
 
 class TaskSerializer(serializers.ModelSerializer):
-    assigned_to_details = UserSerializer(source='assigned_to', read_only=True)
+    assigned_to_details = NestedUserSerializer(source='assigned_to', read_only=True)
     comments = TaskCommentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Task
         fields = '__all__'
 
-class ProjectSerializer(serializers.ModelSerializer):
-    lead_details = UserSerializer(source='lead', read_only=True)
-    members_details = UserSerializer(source='members', many=True, read_only=True)
+class PublicProjectSerializer(serializers.ModelSerializer):
+    """What non-members see of a project: no tasks, threads, join requests or status requests."""
+    lead_details = NestedUserSerializer(source='lead', read_only=True)
+    members_details = NestedUserSerializer(source='members', many=True, read_only=True)
+
+    class Meta:
+        model = Project
+        exclude = ['status_update_requested', 'status_requested_by']
+
+class ProjectSerializer(PublicProjectSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
     threads = ProjectThreadSerializer(many=True, read_only=True)
     join_requests = ProjectRequestSerializer(many=True, read_only=True)
@@ -51,22 +58,23 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def to_representation(self, instance):
-        ret = super().to_representation(instance)
+        # Security: Only show inner details to members/leads or staff. Decided
+        # before serializing, so management data is never walked for visitors
+        if not self._is_member(instance):
+            if not hasattr(self, '_public'):
+                self._public = PublicProjectSerializer(context=self.context)
+            return self._public.to_representation(instance)
+        return super().to_representation(instance)
+
+    def _is_member(self, instance):
         request = self.context.get('request')
-        
-        # Security: Only show inner details to members/leads or staff
-        is_member = False
-        if request and request.user.is_authenticated:
-            user = request.user
-            if user.is_superuser or instance.lead == user or instance.members.filter(id=user.id).exists():
-                is_member = True
-        
-        if not is_member:
-            # Strip sensitive management data for public view
-            ret.pop('threads', None)
-            ret.pop('tasks', None)
-            ret.pop('join_requests', None)
-            ret.pop('status_update_requested', None)
-            ret.pop('status_requested_by', None)
-            
-        return ret
+        if not request or not request.user.is_authenticated:
+            return False
+        user = request.user
+        return user.is_superuser or instance.lead_id == user.id or self._has_member(instance, user)
+
+    def _has_member(self, instance, user):
+        # Use the prefetched member list when the view loaded one
+        if 'members' in getattr(instance, '_prefetched_objects_cache', {}):
+            return any(m.id == user.id for m in instance.members.all())
+        return instance.members.filter(id=user.id).exists()
@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, m2m_changed
+from django.dispatch import receiver
+from .models import Project, Task, ThreadMessage
+from .realtime import get_broker, project_channel, publish_project_event
+from .tombstones import record_removed
+
+def _has_listeners(project_id):
+    # Nobody has the stream open (always the case under WSGI): skip serializing
+    return get_broker().subscriber_count(project_channel(project_id)) > 0
+
+@receiver(post_save, sender=ThreadMessage)
+def push_thread_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+    from .serializers import ThreadMessageSerializer
+
+    def publish():
+        project_id = instance.thread.project_id
+        if not _has_listeners(project_id):
+            return
+        publish_project_event(project_id, {
+            'type': 'message',
+            'thread': instance.thread_id,
+            'message': ThreadMessageSerializer(instance).data,
+        })
+        # Same shape as sync_state's threads_state, for clients tracking the last id
+        publish_project_event(project_id, {
+            'type': 'state',
+            'threads_state': {instance.thread_id: instance.id},
+        })
+    transaction.on_commit(publish)
+
+@receiver(post_save, sender=Task)
+def push_task_change(sender, instance, **kwargs):
+    from .serializers import TaskSerializer
+    if not _has_listeners(instance.project_id):
+        return
+
+    def publish():
+        publish_project_event(instance.project_id, {
+            'type': 'task',
+            'task': TaskSerializer(instance).data,
+        })
+    transaction.on_commit(publish)
+
+
+# --- Tombstones for delta syncs (messages and tasks are recorded where they are deleted) ---
+
+@receiver(m2m_changed, sender=Project.members.through)
+def tombstone_removed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.projects if reverse else instance.members
+        instance._cleared_member_ids = list(related.values_list('id', flat=True))
+        return
+    if action == 'post_remove':
+        ids = pk_set
+    elif action == 'post_clear':
+        ids = getattr(instance, '_cleared_member_ids', [])
+    else:
+        return
+    if reverse:
+        for project_id in ids:
+            record_removed(project_id, 'MEMBER', [instance.pk])
+    elif ids:
+        record_removed(instance.pk, 'MEMBER', ids)
+
+@receiver(pre_save, sender=Project)
+def remember_previous_lead(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_lead_id = Project.objects.filter(pk=instance.pk).values_list('lead_id', flat=True).first()
+
+@receiver(post_save, sender=Project)
+def tombstone_replaced_lead(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_lead_id', None)
+    if previous and previous != instance.lead_id and not instance.members.filter(id=previous).exists():
+        record_removed(instance.pk, 'MEMBER', [previous])
@@ -0,0 +1,40 @@
+"""
+Stream tickets for projects.views.project_events.
+
+A ticket is issued to an authenticated member over the normal API, lives for
+TICKET_LIFETIME and is deleted when the stream redeems it, so a URL that ends
+up in an access log or the browser history cannot be replayed.
+"""
+import secrets
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import StreamTicket
+
+TICKET_LIFETIME = timedelta(seconds=30)
+
+
+def issue_ticket(user, project):
+    now = timezone.now()
+    # Unredeemed tickets only accumulate from abandoned connects; clear them as we go
+    StreamTicket.objects.filter(expires_at__lte=now).delete()
+    ticket = StreamTicket.objects.create(
+        key=secrets.token_urlsafe(32), user=user, project=project,
+        expires_at=now + TICKET_LIFETIME,
+    )
+    return ticket.key
+
+
+def redeem_ticket(key, project_id):
+    """The ticket's user, or None if it is unknown, expired, for another project or already used."""
+    ticket = (
+        StreamTicket.objects.filter(key=key, project_id=project_id, expires_at__gt=timezone.now())
+        .select_related('user').first()
+    )
+    if ticket is None:
+        return None
+    # Only the request whose delete removed the row gets the user, so two
+    # concurrent redeems of one ticket cannot both succeed
+    deleted, _ = StreamTicket.objects.filter(pk=ticket.pk).delete()
+    return ticket.user if deleted else None
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User, MemberProfile
+from .models import Project, Task, TaskComment, ProjectRequest, ProjectThread, ThreadMessage, StreamTicket
+from .realtime import CacheBroker, project_channel
+from .stream_tickets import issue_ticket, redeem_ticket
+from .views import _stream_user
+
+
+class ProjectQueryCountTests(TestCase):
+    """ProjectViewSet list/retrieve must stay a bounded number of queries."""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user('viewer')
+        MemberProfile.objects.create(user=self.viewer, full_name='Viewer', position='Member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def _make_project(self, n):
+        lead = User.objects.create_user(f'lead{Project.objects.count()}')
+        MemberProfile.objects.create(user=lead, full_name='Lead', position='Head')
+        project = Project.objects.create(title='Bot', description='d', lead=lead, is_public=True)
+        project.members.add(self.viewer, lead)
+        for i in range(n):
+            member = User.objects.create_user(f'm{project.id}_{i}')
+            MemberProfile.objects.create(user=member, full_name=f'Member {i}')
+            project.members.add(member)
+            task = Task.objects.create(project=project, title=f'Task {i}', assigned_to=member)
+            TaskComment.objects.create(task=task, author=member, content='ok')
+            thread = ProjectThread.objects.create(project=project, title=f'Thread {i}', created_by=member)
+            for _ in range(3):
+                ThreadMessage.objects.create(thread=thread, author=member, content='hi')
+            outsider = User.objects.create_user(f'o{project.id}_{i}')
+            ProjectRequest.objects.create(project=project, user=outsider)
+        return project
+
+    def _count(self, url):
+        for c in caches.all():
+            c.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_list_query_count_is_independent_of_size(self):
+        self._make_project(1)
+        small, _ = self._count('/api/projects/')
+
+        for _ in range(3):
+            self._make_project(5)
+        large, response = self._count('/api/projects/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIn('threads', response.data['results'][0])
+
+    def test_anonymous_list_query_count_is_independent_of_size(self):
+        self.client.force_authenticate(None)
+        self._make_project(1)
+        small, _ = self._count('/api/projects/')
+
+        for _ in range(10):
+            self._make_project(2)
+        large, response = self._count('/api/projects/')
+
+        self.assertEqual(small, large)
+        results = response.json()['results'] # Rendered by the public response cache
+        self.assertEqual(len(results), 11)
+        for key in ('threads', 'tasks', 'join_requests', 'status_update_requested'):
+            self.assertNotIn(key, results[0])
+
+    def test_retrieve_query_count_is_independent_of_size(self):
+        small_project = self._make_project(1)
+        small, _ = self._count(f'/api/projects/{small_project.id}/')
+
+        large_project = self._make_project(8)
+        large, response = self._count(f'/api/projects/{large_project.id}/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['threads']), 8)
+        self.assertEqual(len(response.data['threads'][0]['messages']), 3)
+
+
+class ProjectDeltaTests(TestCase):
+    """delta is for project members only and reports what was removed."""
+
+    def setUp(self):
+        for c in caches.all():
+            c.clear()
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider')
+        # No lead: an anonymous user's id (None) must not count as the lead
+        self.project = Project.objects.create(title='Bot', description='d')
+        self.project.members.add(self.member)
+        self.thread = ProjectThread.objects.create(project=self.project, title='General', created_by=self.member)
+        self.message = ThreadMessage.objects.create(thread=self.thread, author=self.member, content='hi')
+        self.task = Task.objects.create(project=self.project, title='Ship')
+        self.client = APIClient()
+        self.url = f'/api/projects/{self.project.id}/delta/'
+
+    def _delta(self, user, **params):
+        if user:
+            self.client.force_authenticate(user)
+        return self.client.get(self.url, params)
+
+    def test_anonymous_request_is_rejected(self):
+        response = self._delta(None)
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('messages', response.data)
+
+    def test_non_member_is_rejected(self):
+        self.assertEqual(self._delta(self.outsider).status_code, 404)
+        # Public projects are readable by everyone, their chat and tasks are not
+        Project.objects.filter(id=self.project.id).update(is_public=True)
+        self.assertEqual(self._delta(self.outsider).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self._delta(None).status_code, 401)
+
+    def test_removed_rows_are_reported(self):
+        cursor = self._delta(self.member).data['cursor']['time']
+        other = User.objects.create_user('other')
+        self.project.members.add(other)
+
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.delete(f'/api/messages/{self.message.id}/').status_code, 204)
+        self.assertEqual(self.client.delete(f'/api/tasks/{self.task.id}/').status_code, 403) # needs can_manage_projects
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'a@x.y', 'x'))
+        self.assertEqual(self.client.delete(f'/api/tasks/{self.task.id}/').status_code, 204)
+        self.project.members.remove(other)
+
+        removed = self._delta(self.member, since=cursor).data['removed']
+        self.assertEqual(removed, {'messages': [self.message.id], 'tasks': [self.task.id], 'members': [other.id]})
+
+    def test_stale_cursor_asks_for_resync(self):
+        stale = (timezone.now() - timedelta(days=30)).isoformat()
+        self.assertTrue(self._delta(self.member, since=stale).data['resync'])
+
+
+class StreamTicketTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user('member')
+        self.project = Project.objects.create(title='Bot', description='d')
+        self.project.members.add(self.member)
+
+    def test_ticket_is_single_use_and_bound_to_its_project(self):
+        other = Project.objects.create(title='Other', description='d')
+        key = issue_ticket(self.member, self.project)
+        self.assertIsNone(redeem_ticket(key, other.id))
+        self.assertEqual(redeem_ticket(key, self.project.id), self.member)
+        self.assertIsNone(redeem_ticket(key, self.project.id))
+
+    def test_expired_ticket_is_refused_and_purged(self):
+        key = issue_ticket(self.member, self.project)
+        StreamTicket.objects.filter(pk=key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(redeem_ticket(key, self.project.id))
+        issue_ticket(self.member, self.project)
+        self.assertFalse(StreamTicket.objects.filter(pk=key).exists())
+
+    def test_stream_accepts_ticket_not_jwt_in_query_string(self):
+        token = str(RefreshToken.for_user(self.member).access_token)
+        factory = RequestFactory()
+        self.assertIsNone(_stream_user(factory.get(f'/?token={token}'), self.project.id))
+        key = issue_ticket(self.member, self.project)
+        self.assertEqual(_stream_user(factory.get(f'/?ticket={key}'), self.project.id), self.member)
+
+    def test_ticket_endpoint_needs_asgi(self):
+        client = APIClient()
+        client.force_authenticate(self.member)
+        response = client.post(f'/api/projects/{self.project.id}/stream_ticket/')
+        self.assertEqual(response.status_code, 501)
+
+
+class CacheBrokerTests(TestCase):
+    def setUp(self):
+        caches['presence'].clear()
+
+    def test_subscriber_receives_events_published_after_it_started_listening(self):
+        broker = CacheBroker()
+        channel = project_channel(1)
+        broker.publish(channel, {'type': 'task', 'id': 0})  # Before subscribing: not delivered
+
+        async def listen():
+            subscription = broker.subscribe(channel)
+            with self.assertRaises(asyncio.TimeoutError):
+                await subscription.get(timeout=0)
+            self.assertEqual(broker.subscriber_count(channel), 1)
+            broker.publish(channel, {'type': 'task', 'id': 1})
+            broker.publish(channel, {'type': 'task', 'id': 2})
+            return [await subscription.get(timeout=1), await subscription.get(timeout=1)]
+
+        events = asyncio.run(listen())
+        self.assertEqual([e['id'] for e in events], [1, 2])
+
+    def test_no_listeners_until_a_subscription_polls(self):
+        self.assertEqual(CacheBroker().subscriber_count(project_channel(2)), 0)
@@ -0,0 +1,46 @@
+"""
+Removal records for ProjectViewSet.delta.
+
+Deleting a message or task, or removing a member, leaves a ProjectTombstone
+so a client syncing incrementally learns which rows to drop. Bulk deletes
+(history wipes, ephemeral expiry) record their ids in one insert; member
+removals are picked up by projects.signals. Tombstones are kept for
+TOMBSTONE_RETENTION; a client whose cursor is older must reload in full.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ProjectTombstone
+
+TOMBSTONE_RETENTION = timedelta(days=7)
+KIND_KEYS = {'MESSAGE': 'messages', 'TASK': 'tasks', 'MEMBER': 'members'}
+
+
+def record_removed(project_id, kind, ids):
+    ProjectTombstone.objects.bulk_create([
+        ProjectTombstone(project_id=project_id, kind=kind, object_id=object_id) for object_id in ids
+    ])
+
+
+def removed_since(project, since):
+    """{'messages': [ids], 'tasks': [ids], 'members': [ids]} removed after ``since``."""
+    removed = {key: [] for key in KIND_KEYS.values()}
+    rows = ProjectTombstone.objects.filter(project=project, deleted_at__gt=since).order_by('id')
+    for kind, object_id in rows.values_list('kind', 'object_id'):
+        removed[KIND_KEYS[kind]].append(object_id)
+    if removed['members']:
+        # Someone removed and added back is a member again
+        current = set(project.members.values_list('id', flat=True)) | {project.lead_id}
+        removed['members'] = [m for m in dict.fromkeys(removed['members']) if m not in current]
+    return removed
+
+
+def needs_resync(since, now=None):
+    return since < (now or timezone.now()) - TOMBSTONE_RETENTION
+
+
+def purge_tombstones(now=None):
+    """Drop tombstones past retention. Returns rows deleted."""
+    cutoff = (now or timezone.now()) - TOMBSTONE_RETENTION
+    return ProjectTombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, TaskViewSet, ProjectRequestViewSet, ProjectThreadViewSet, ThreadMessageViewSet
+from .views import ProjectViewSet, TaskViewSet, ProjectRequestViewSet, ProjectThreadViewSet, ThreadMessageViewSet, project_events
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='projects')
@@ -11,4 +11,5 @@ router.register(r'messages', ThreadMessageViewSet, basename='messages')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('projects/<int:pk>/events/', project_events, name='project_events'),
 ]
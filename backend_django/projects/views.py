@@ -1,4 +1,9 @@
-from django.db.models import Q
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q, Prefetch, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,10 +13,36 @@ from .serializers import (
     ProjectRequestSerializer, ProjectThreadSerializer, ThreadMessageSerializer
 )
 from users.permissions import GlobalPermission
-from .permissions import IsProjectMember
+from users.serializers import expanded_user_prefetches
+from core.caching import PublicResponseCacheMixin
+from .permissions import IsProjectMember, is_project_member
+from .tombstones import record_removed, removed_since, needs_resync
+from . import presence
+from .realtime import get_broker, project_channel, publish_project_event
+from .stream_tickets import TICKET_LIFETIME, issue_ticket, redeem_ticket
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 
-class ProjectViewSet(viewsets.ModelViewSet):
+import asyncio
+import hashlib
+import json
+
+User = get_user_model()
+
+DELTA_MESSAGE_LIMIT = 200
+STREAM_KEEPALIVE_SECONDS = 15
+
+USER_SUMMARY_FIELDS = (
+    'id', 'username', 'last_login',
+    'profile__id', 'profile__full_name', 'profile__image', 'profile__position',
+)
+
+class ProjectViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('projects.Project', 'users.User', 'users.MemberProfile')
     serializer_class = ProjectSerializer
     permission_classes = [GlobalPermission]
 
@@ -20,18 +51,52 @@ class ProjectViewSet(viewsets.ModelViewSet):
         
         # 1. Base Query: Everything for Superusers
         if user.is_authenticated and user.is_superuser:
-            return Project.objects.all().order_by('-created_at')
+            qs = Project.objects.all()
             
         # 2. Logic for Authenticated Members/Leads
-        if user.is_authenticated:
-            return Project.objects.filter(
+        elif user.is_authenticated:
+            qs = Project.objects.filter(
                 Q(is_public=True) | 
                 Q(lead=user) | 
                 Q(members=user)
-            ).distinct().order_by('-created_at')
+            ).distinct()
             
         # 3. Logic for Public/Anonymous Users
-        return Project.objects.filter(is_public=True).order_by('-created_at')
+        else:
+            qs = Project.objects.filter(is_public=True)
+
+        if self.action in ('list', 'retrieve'):
+            qs = qs.select_related('lead__profile').prefetch_related(*self.get_prefetch_plan())
+        return qs.order_by('-created_at')
+
+    def get_prefetch_plan(self):
+        """
+        Everything ProjectSerializer walks, loaded in a fixed number of queries
+        regardless of how many projects, tasks, threads or messages exist.
+        """
+        users = self._nested_users()
+        plan = [Prefetch('members', queryset=users), *expanded_user_prefetches(self.request, {'lead_details': 'lead'})]
+        if not self.request.user.is_authenticated:
+            # Visitors get PublicProjectSerializer, which renders members and nothing below
+            return plan
+        return plan + [
+            Prefetch('tasks', queryset=Task.objects.select_related('assigned_to__profile').prefetch_related(
+                Prefetch('comments', queryset=TaskComment.objects.select_related('author').only(
+                    'id', 'task_id', 'content', 'created_at', 'author__id', 'author__username'
+                ))
+            )),
+            Prefetch('threads', queryset=ProjectThread.objects.select_related('created_by__profile').prefetch_related(
+                Prefetch('messages', queryset=ThreadMessage.objects.select_related('author__profile'))
+            )),
+            Prefetch('join_requests', queryset=ProjectRequest.objects.select_related('user__profile')),
+        ]
+
+    def _nested_users(self):
+        qs = User.objects.select_related('profile')
+        if self.request.query_params.get('expand'):
+            return qs
+        # Summary rendering only needs a handful of columns
+        return qs.only(*USER_SUMMARY_FIELDS)
 
     def perform_create(self, serializer):
         # Save project first
@@ -99,11 +164,11 @@ class ProjectViewSet(viewsets.ModelViewSet):
             if project.lead: members.append(project.lead)
             members_status = {m.id: m.last_login for m in members}
             
-            # 2. Threads State
-            threads_state = {}
-            for t in project.threads.all():
-                last_msg = t.messages.last()
-                threads_state[t.id] = last_msg.id if last_msg else 0
+            # 2. Threads State (one aggregate query instead of one per thread)
+            threads_state = {
+                t['id']: t['last_id'] or 0
+                for t in project.threads.annotate(last_id=Max('messages__id')).values('id', 'last_id')
+            }
                 
             return Response({
                 "members_status": members_status,
@@ -113,6 +178,88 @@ class ProjectViewSet(viewsets.ModelViewSet):
             print(f"Sync State Error: {e}")
             return Response({'error': str(e)}, status=500)
 
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def delta(self, request, pk=None):
+        """
+        Incremental sync for open project tabs.
+        Query: ?since_message=<last seen message id>&since=<cursor.time from previous call>
+        Returns only messages, task changes and member logins after the cursor,
+        the ids removed since then, and the next cursor. "resync": true means
+        the cursor is older than the removal records and the tab must reload.
+        Answers 304 when If-None-Match matches.
+        """
+        project = self.get_object()
+        if not is_project_member(request.user, project):
+            return Response({"error": "Must be a project member."}, status=403)
+
+        try:
+            since_message = int(request.query_params.get('since_message') or 0)
+        except ValueError:
+            return Response({"error": "since_message must be a message id"}, status=400)
+        since = None
+        raw_since = request.query_params.get('since')
+        if raw_since:
+            since = parse_datetime(raw_since)
+            if since is None:
+                return Response({"error": "since must be an ISO timestamp"}, status=400)
+
+        # Taken before reading so nothing written meanwhile falls between two cursors
+        now = timezone.now()
+        if since and needs_resync(since, now):
+            return Response({"resync": True, "cursor": {"message": 0, "time": now.isoformat()}})
+
+        messages = list(
+            ThreadMessage.objects.filter(thread__project=project, id__gt=since_message)
+            .select_related('author__profile').order_by('id')[:DELTA_MESSAGE_LIMIT + 1]
+        )
+        has_more = len(messages) > DELTA_MESSAGE_LIMIT
+        messages = messages[:DELTA_MESSAGE_LIMIT]
+
+        tasks = Task.objects.filter(project=project).select_related('assigned_to__profile').prefetch_related(
+            Prefetch('comments', queryset=TaskComment.objects.select_related('author'))
+        )
+        members = User.objects.filter(Q(projects=project) | Q(led_projects=project))
+        if since:
+            tasks = tasks.filter(updated_at__gt=since)
+            members = members.filter(last_login__gt=since)
+        members_status = {m['id']: m['last_login'] for m in members.distinct().values('id', 'last_login')}
+
+        context = self.get_serializer_context()
+        payload = {
+            "messages": ThreadMessageSerializer(messages, many=True, context=context).data,
+            "tasks": TaskSerializer(tasks, many=True, context=context).data,
+            "members_status": members_status,
+            "removed": removed_since(project, since) if since else {},
+            "has_more": has_more,
+        }
+
+        # The ETag covers the changes only, so an unchanged tab gets 304 on every poll
+        etag = '"%s"' % hashlib.md5(
+            json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        payload["cursor"] = {
+            "message": messages[-1].id if messages else since_message,
+            "time": (since if has_more and since else now).isoformat(),
+        }
+        return Response(payload, headers={'ETag': etag})
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def stream_ticket(self, request, pk=None):
+        """Single-use ticket for opening /projects/<id>/events/ (see projects.stream_tickets)."""
+        if not isinstance(request._request, ASGIRequest):
+            # Nothing to connect to; the client stays on delta polling
+            return Response({"error": "Event stream requires the ASGI server"}, status=501)
+        project = self.get_object()
+        if not is_project_member(request.user, project):
+            return Response({"error": "Must be a project member."}, status=403)
+        return Response({
+            "ticket": issue_ticket(request.user, project),
+            "expires_in": int(TICKET_LIFETIME.total_seconds()),
+        })
+
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
@@ -123,6 +270,11 @@ class TaskViewSet(viewsets.ModelViewSet):
             return Task.objects.all()
         return Task.objects.none()
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_removed(instance.project_id, 'TASK', [instance.id])
+            instance.delete()
+
     @action(detail=True, methods=['post'])
     def comment(self, request, pk=None):
         task = self.get_object()
@@ -130,6 +282,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         if not content: return Response({'error': 'Content required'}, status=400)
         
         TaskComment.objects.create(task=task, author=request.user, content=content)
+        task.save(update_fields=['updated_at']) # Surface the comment in project delta syncs
         return Response({'status': 'Comment added'})
 
 class ProjectRequestViewSet(viewsets.ModelViewSet):
@@ -171,9 +324,10 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        qs = ProjectThread.objects.select_related('project')
         if user.is_superuser:
-            return ProjectThread.objects.all()
-        return ProjectThread.objects.filter(Q(project__lead=user) | Q(project__members=user)).distinct()
+            return qs.all()
+        return qs.filter(Q(project__lead=user) | Q(project__members=user)).distinct()
 
     def perform_create(self, serializer):
         project = serializer.validated_data.get('project')
@@ -181,6 +335,11 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied("Must be a project member.")
         serializer.save(created_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_removed(instance.project_id, 'MESSAGE', instance.messages.values_list('id', flat=True))
+            instance.delete()
+
     @action(detail=True, methods=['post'])
     def toggle_ephemeral(self, request, pk=None):
         thread = self.get_object()
@@ -196,17 +355,22 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
         if not (user.is_superuser or user == thread.project.lead):
              return Response({"error": "Only the Project Lead can wipe history."}, status=403)
              
-        count = thread.messages.all().delete()[0]
+        with transaction.atomic():
+            record_removed(thread.project_id, 'MESSAGE', thread.messages.values_list('id', flat=True))
+            count = thread.messages.all().delete()[0]
         return Response({'status': 'purged', 'count': count})
 
     @action(detail=True, methods=['post'])
     def signal_typing(self, request, pk=None):
         try:
-            from django.core.cache import cache
             thread = self.get_object()
             user_id = request.user.id
-            key = f"typing:{thread.id}:{user_id}"
-            cache.set(key, request.user.username, timeout=4)
+            presence.touch(thread.id, request.user, typing=True)
+            publish_project_event(thread.project_id, {
+                'type': 'typing',
+                'thread': thread.id,
+                'user': {'id': user_id, 'username': request.user.username},
+            })
             return Response({'status': 'ok'})
         except Exception as e:
             print(f"Typing Signal Error: {e}")
@@ -215,21 +379,9 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def get_typing_status(self, request, pk=None):
         try:
-            from django.core.cache import cache
             thread = self.get_object()
-            
-            active_typers = []
-            members = list(thread.project.members.all())
-            if thread.project.lead: members.append(thread.project.lead)
-            
-            for m in members:
-                if m.id == request.user.id: continue
-                key = f"typing:{thread.id}:{m.id}"
-                username = cache.get(key)
-                if username:
-                    active_typers.append({'id': m.id, 'username': username})
-                    
-            return Response({'typers': active_typers})
+            # { typers: [{id, username}], viewers_online: n } from one presence entry
+            return Response(presence.status(thread.id, request.user))
         except Exception as e:
             print(f"Typing Status Error: {e}")
             return Response({'error': str(e)}, status=500)
@@ -238,24 +390,79 @@ class ThreadMessageViewSet(viewsets.ModelViewSet):
     queryset = ThreadMessage.objects.all()
     serializer_class = ThreadMessageSerializer
     permission_classes = [IsAuthenticated, IsProjectMember]
+    cursor_ordering = ('-created_at', '-id') # Latest page first; `next` pages back in time
 
     def get_queryset(self):
         user = self.request.user
+        qs = ThreadMessage.objects.select_related('author__profile').prefetch_related(
+            'author__user_roles', *expanded_user_prefetches(self.request, {'author_details': 'author'})
+        )
         if user.is_superuser:
-            return ThreadMessage.objects.all()
-        return ThreadMessage.objects.filter(Q(thread__project__lead=user) | Q(thread__project__members=user)).distinct()
+            return qs.all()
+        return qs.filter(Q(thread__project__lead=user) | Q(thread__project__members=user)).distinct()
 
     def perform_create(self, serializer):
         thread = serializer.validated_data.get('thread')
         if thread and not (self.request.user == thread.project.lead or self.request.user in thread.project.members.all()):
             raise permissions.PermissionDenied("Must be a project member.")
-        message = serializer.save(author=self.request.user)
-        
-        # EPHEMERAL CLEANUP: If thread is ephemeral, delete messages older than 1 hour
-        if message.thread.is_ephemeral:
-            from django.utils import timezone
-            from datetime import timedelta
-            expiry = timezone.now() - timedelta(hours=1)
-            ThreadMessage.objects.filter(thread=message.thread, created_at__lt=expiry).delete()
-            # Also log for audit
-            print(f"Cleanup performed for ephemeral thread: {message.thread.title}")
+        serializer.save(author=self.request.user)
+        # Ephemeral threads are expired by the purge_ephemeral_messages command
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_removed(instance.thread.project_id, 'MESSAGE', [instance.id])
+            instance.delete()
+
+# --- SERVER PUSH (SSE) ---
+
+def _stream_user(request, pk):
+    """JWT from the Authorization header, or a ?ticket= from stream_ticket (EventSource cannot set headers)."""
+    try:
+        result = JWTAuthentication().authenticate(request)
+        if result:
+            return result[0]
+    except (InvalidToken, TokenError):
+        return None
+    ticket = request.GET.get('ticket')
+    return redeem_ticket(ticket, pk) if ticket else None
+
+def _stream_project(user, pk):
+    project = Project.objects.filter(pk=pk).first()
+    if not project:
+        return None
+    return project if is_project_member(user, project) else None
+
+async def project_events(request, pk):
+    """
+    text/event-stream of a project's chat: new messages, typing signals,
+    thread state and task changes. Only available when served over ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "Event stream requires the ASGI server"}, status=501)
+
+    user = await sync_to_async(_stream_user)(request, pk)
+    if not user or not user.is_active:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    project = await sync_to_async(_stream_project)(user, pk)
+    if not project:
+        return JsonResponse({"error": "Must be a project member."}, status=403)
+
+    async def stream():
+        subscription = get_broker().subscribe(project_channel(project.id))
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                data = json.dumps(event, cls=DjangoJSONEncoder)
+                yield f"event: {event.get('type', 'message')}\ndata: {data}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,95 @@
+"""
+Compiled answer keys for grading.
+
+A quiz's key maps question id -> (frozenset of correct option ids, marks,
+negative marks) for the auto-graded (MCQ/MSQ) questions. It is built with
+two queries, cached in the 'quizzes' cache under the quiz's content
+version, and grading an attempt against it touches no database beyond
+reading that version. The version is the Quiz.content_version column,
+which quizzes.signals bumps whenever the quiz, a question or an option
+changes, so every worker sees an edit as soon as it commits.
+"""
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.connection import ConnectionProxy
+
+from .models import Quiz, Question, Option
+
+cache = ConnectionProxy(caches, 'quizzes')
+
+KEY_TIMEOUT = 60 * 60 * 24
+AUTO_GRADED = ('MCQ', 'MSQ')
+
+
+def quiz_version(quiz_id):
+    """The quiz's content version, or None if it does not exist."""
+    return Quiz.objects.filter(id=quiz_id).values_list('content_version', flat=True).first()
+
+
+def bump_quiz_version(quiz_id=None, **filters):
+    """Increment the content version of the quiz with this id (or matching ``filters``)."""
+    if quiz_id is not None:
+        filters['id'] = quiz_id
+    Quiz.objects.filter(**filters).update(content_version=F('content_version') + 1)
+
+
+def compile_answer_key(quiz_id):
+    questions = Question.objects.filter(quiz_id=quiz_id, question_type__in=AUTO_GRADED)
+    marks = {q_id: (m, neg) for q_id, m, neg in questions.values_list('id', 'marks', 'negative_marks')}
+    correct = {q_id: set() for q_id in marks}
+    for q_id, o_id in Option.objects.filter(question__in=questions, is_correct=True).values_list('question_id', 'id'):
+        correct[q_id].add(o_id)
+    return {q_id: (frozenset(correct[q_id]), m, neg) for q_id, (m, neg) in marks.items()}
+
+
+def get_answer_key(quiz_id):
+    key = f"answer_key:{quiz_id}:{quiz_version(quiz_id)}"
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = compile_answer_key(quiz_id)
+        cache.set(key, answer_key, KEY_TIMEOUT)
+    return answer_key
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def check_answers(quiz_id, answers):
+    """
+    Validate a {question_id: answer} dict from the client: every id must be a
+    question of this quiz, MCQ/MSQ answers an option id or a list of them,
+    short/long answers text (or a list holding it). None clears an answer.
+    Raises ValueError for anything else.
+    """
+    if not answers:
+        return
+    types = dict(Question.objects.filter(quiz_id=quiz_id).values_list('id', 'question_type'))
+    for q_id, answer in answers.items():
+        q_type = types.get(int(q_id)) if str(q_id).isdigit() else None
+        if q_type is None:
+            raise ValueError(f"{q_id!r} is not a question of this quiz")
+        if answer is None:
+            continue
+        values = answer if isinstance(answer, list) else [answer]
+        valid = _is_int if q_type in AUTO_GRADED else (lambda v: isinstance(v, str))
+        if not all(valid(v) for v in values):
+            expected = "an option id or a list of option ids" if q_type in AUTO_GRADED else "text"
+            raise ValueError(f"Answer to question {q_id} must be {expected}")
+
+
+def _chosen(answer):
+    if not isinstance(answer, (list, tuple)):
+        answer = [answer]
+    return frozenset(map(int, answer))
+
+
+def grade(answer_key, responses):
+    """Score for a responses dict ({question_id: [option_ids]}). Unanswered questions score 0."""
+    total = 0
+    for q_id, (correct, marks, negative_marks) in answer_key.items():
+        answer = responses.get(str(q_id))
+        if not answer:
+            continue
+        total += marks if _chosen(answer) == correct else -negative_marks
+    return total
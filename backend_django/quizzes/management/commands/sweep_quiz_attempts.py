@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.sweeper import SWEEP_BATCH_SIZE, sweep_expired_attempts
+
+
+class Command(BaseCommand):
+    help = "Auto-submit ONGOING quiz attempts past their end time (run from cron, or with --loop during an OA)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+                            help="Attempts graded per transaction")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running, sweeping every --interval seconds")
+        parser.add_argument('--interval', type=int, default=5,
+                            help="Seconds between sweeps in --loop mode")
+
+    def handle(self, *args, **options):
+        while True:
+            closed = sweep_expired_attempts(batch_size=options['batch_size'])
+            if closed or not options['loop']:
+                self.stdout.write(f"Auto-submitted {closed} expired attempts")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_quiz_regrade_runs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='status',
+            field=models.CharField(choices=[('STARTING', 'Questionnaire Phase'), ('ONGOING', 'Quiz in Progress'), ('SUBMITTED', 'Manually Submitted'), ('AUTO_SUBMITTED', 'Auto Submitted (Timer)'), ('DISQUALIFIED', 'Disqualified (Proctoring Violation)'), ('GRADING_FAILED', 'Auto-submitted, Needs Manual Grading')], default='STARTING', max_length=20),
+        ),
+    ]
@@ -25,6 +25,9 @@ class Quiz(models.Model):
     default_negative_marks = models.FloatField(default=1.0)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by quizzes.signals on any quiz/question/option change; keys the
+    # compiled answer key and rendered paper in every worker
+    content_version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return self.title
@@ -68,6 +71,7 @@ class QuizAttempt(models.Model):
         ('SUBMITTED', 'Manually Submitted'),
         ('AUTO_SUBMITTED', 'Auto Submitted (Timer)'),
         ('DISQUALIFIED', 'Disqualified (Proctoring Violation)'),
+        ('GRADING_FAILED', 'Auto-submitted, Needs Manual Grading'),
     ]
     
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
@@ -92,8 +96,14 @@ class QuizAttempt(models.Model):
     score = models.FloatField(default=0.0)
     
     class Meta:
-        pass
         # unique_together removed to support guests
+        indexes = [
+            # Expired ONGOING attempts for the auto-submit sweeper
+            models.Index(fields=['status', 'end_time'], name='attempt_status_end_idx'),
+            # Attempt lookup on every join/start/autosave/submit request
+            models.Index(fields=['quiz', 'user'], name='attempt_quiz_user_idx'),
+            models.Index(fields=['quiz', 'candidate_email'], name='attempt_quiz_email_idx'),
+        ]
 
     @property
     def time_left_seconds(self):
@@ -102,3 +112,45 @@ class QuizAttempt(models.Model):
         now = timezone.now()
         remaining = (self.end_time - now).total_seconds()
         return max(0, int(remaining))
+
+
+class QuizRegrade(models.Model):
+    """One regrade run; doubles as the per-quiz lock and the progress the admin UI polls."""
+    STATE_CHOICES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='regrades')
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default='running')
+    dry_run = models.BooleanField(default=False)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # The lock: at most one running regrade per quiz, across all workers
+            models.UniqueConstraint(fields=['quiz'], condition=models.Q(state='running'),
+                                    name='one_running_regrade_per_quiz'),
+        ]
+        indexes = [
+            models.Index(fields=['quiz', '-started_at'], name='regrade_quiz_started_idx'),
+        ]
+
+    def as_progress(self):
+        return {
+            'state': self.state,
+            'dry_run': self.dry_run,
+            'total': self.total,
+            'processed': self.processed,
+            'changed': self.changed,
+            'error': self.error or None,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,48 @@
+"""
+Rendered public quiz papers for join_by_code.
+
+The PublicQuizSerializer output (questions and options without answers)
+is rendered once per Quiz.content_version (bumped in the database by
+quizzes.signals, so every worker sees an edit) and kept in the 'quizzes'
+cache as encoded JSON with its ETag, so a wave of candidates joining at
+once costs one render. Only the attempt half of a join response is
+serialized per request. The short timeout bounds how stale the embedded
+creator card can get.
+"""
+import hashlib
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.renderers import JSONRenderer
+
+from .models import Quiz
+from .serializers import PublicQuizSerializer
+
+cache = ConnectionProxy(caches, 'quizzes')
+
+PAPER_TIMEOUT = 60 * 10
+
+
+def build_paper(quiz_id):
+    quiz = (
+        Quiz.objects.filter(id=quiz_id)
+        .select_related('creator__profile')
+        .prefetch_related('questions__options')
+        .first()
+    )
+    if quiz is None:
+        return None
+    return {'body': JSONRenderer().render(PublicQuizSerializer(quiz).data)}
+
+
+def get_paper(quiz):
+    """{'body', 'etag'} for the quiz (an instance with content_version loaded), or None if it is gone."""
+    key = f"quiz_paper:{quiz.id}:{quiz.content_version}"
+    paper = cache.get(key)
+    if paper is None:
+        paper = build_paper(quiz.id)
+        if paper is None:
+            return None
+        paper['etag'] = '"%s"' % hashlib.md5(paper['body']).hexdigest()
+        cache.set(key, paper, PAPER_TIMEOUT)
+    return paper
@@ -0,0 +1,103 @@
+"""
+Re-scoring of submitted attempts after an answer-key edit.
+
+Attempts are walked in id order in chunks, graded in memory against a
+freshly compiled key and written back with one bulk_update per chunk.
+A dry run reports the per-attempt diff without writing. Each run is a
+QuizRegrade row: its 'running' state is the per-quiz lock (a partial
+unique constraint), and its counters are the progress the admin UI polls,
+so both are seen by every worker.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .answer_key import compile_answer_key, grade
+from .models import QuizAttempt, QuizRegrade
+
+logger = logging.getLogger(__name__)
+
+REGRADE_BATCH_SIZE = 500
+# A running regrade with no progress for this long belongs to a dead worker
+STALE_AFTER = timedelta(hours=1)
+# Disqualified attempts keep their zero
+GRADED_STATUSES = ('SUBMITTED', 'AUTO_SUBMITTED')
+
+
+def get_progress(quiz_id):
+    run = QuizRegrade.objects.filter(quiz_id=quiz_id).order_by('-started_at', '-id').first()
+    return run.as_progress() if run else None
+
+
+def acquire_regrade(quiz_id, dry_run=False):
+    """The new QuizRegrade run, or None when a regrade of this quiz is already running."""
+    QuizRegrade.objects.filter(
+        quiz_id=quiz_id, state='running', updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(state='failed', error="Abandoned (no progress)", finished_at=timezone.now())
+    try:
+        with transaction.atomic():
+            return QuizRegrade.objects.create(quiz_id=quiz_id, dry_run=dry_run)
+    except IntegrityError:
+        return None
+
+
+def _finish(run, state, error=''):
+    run.state = state
+    run.error = error
+    run.finished_at = timezone.now()
+    run.save(update_fields=['state', 'error', 'finished_at', 'updated_at'])
+
+
+def regrade_quiz(run, batch_size=REGRADE_BATCH_SIZE):
+    """Carry out an acquired run. Records 'failed' with the error (and re-raises) if grading fails."""
+    try:
+        diff = _regrade(run, batch_size)
+    except Exception as e:
+        _finish(run, 'failed', str(e) or type(e).__name__)
+        raise
+    _finish(run, 'done')
+    return dict(run.as_progress(), diff=diff)
+
+
+def _regrade(run, batch_size):
+    # Compiled from the database rather than read from the cache: the edit
+    # that prompted the regrade must be what gets applied
+    answer_key = compile_answer_key(run.quiz_id)
+    attempts = QuizAttempt.objects.filter(quiz_id=run.quiz_id, status__in=GRADED_STATUSES).only(
+        'id', 'score', 'responses', 'user_id', 'candidate_name', 'candidate_email'
+    ).order_by('id')
+
+    run.total = attempts.count()
+    run.save(update_fields=['total', 'updated_at'])
+
+    diff = []
+    last_id = 0
+    while True:
+        chunk = list(attempts.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        changed = []
+        for attempt in chunk:
+            new_score = grade(answer_key, attempt.responses)
+            if new_score != attempt.score:
+                diff.append({
+                    'attempt': attempt.id,
+                    'candidate': attempt.candidate_name or attempt.candidate_email,
+                    'old_score': attempt.score,
+                    'new_score': new_score,
+                })
+                attempt.score = new_score
+                changed.append(attempt)
+
+        if changed and not run.dry_run:
+            with transaction.atomic():
+                QuizAttempt.objects.bulk_update(changed, ['score'])
+
+        run.processed += len(chunk)
+        run.changed += len(changed)
+        run.save(update_fields=['processed', 'changed', 'updated_at'])
+    return diff
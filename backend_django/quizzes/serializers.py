@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Quiz, Question, Option, QuizAttempt
-from users.serializers import UserSerializer
+from users.serializers import NestedUserSerializer
 
 class OptionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +16,7 @@ class QuestionSerializer(serializers.ModelSerializer):
 
 class QuizSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
-    creator_details = UserSerializer(source='creator', read_only=True)
+    creator_details = NestedUserSerializer(source='creator', read_only=True)
     question_count = serializers.IntegerField(source='questions.count', read_only=True)
     
     class Meta:
@@ -25,7 +25,7 @@ class QuizSerializer(serializers.ModelSerializer):
         read_only_fields = ['creator', 'created_at']
 
 class QuizAttemptSerializer(serializers.ModelSerializer):
-    user_details = UserSerializer(source='user', read_only=True)
+    user_details = NestedUserSerializer(source='user', read_only=True)
     time_left = serializers.IntegerField(source='time_left_seconds', read_only=True)
     
     class Meta:
@@ -47,7 +47,7 @@ class PublicQuestionSerializer(serializers.ModelSerializer):
 
 class PublicQuizSerializer(serializers.ModelSerializer):
     questions = PublicQuestionSerializer(many=True, read_only=True)
-    creator_details = UserSerializer(source='creator', read_only=True)
+    creator_details = NestedUserSerializer(source='creator', read_only=True)
     question_count = serializers.IntegerField(source='questions.count', read_only=True)
     
     class Meta:
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Quiz, Question, Option
+from .answer_key import bump_quiz_version
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_changed(sender, instance, created, **kwargs):
+    # A new quiz starts at the field default
+    if not created:
+        bump_quiz_version(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    # Matches nothing when the question itself is being deleted (it bumps the version)
+    bump_quiz_version(questions__id=instance.question_id)
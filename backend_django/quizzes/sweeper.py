@@ -0,0 +1,58 @@
+"""
+Auto-submission of attempts whose time ran out, run by
+``manage.py sweep_quiz_attempts`` so results do not wait for the
+candidate's client to reconnect.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import autosave
+from .answer_key import get_answer_key, grade
+from .models import QuizAttempt
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 200
+
+
+def sweep_expired_attempts(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Grade and close every ONGOING attempt past its end_time. Returns the number closed."""
+    now = now or timezone.now()
+    answer_keys = {}
+    closed = 0
+    while True:
+        with transaction.atomic():
+            # Served by the (status, end_time) index. Rows locked by a manual
+            # submit (QuizViewSet._calculate_and_save) are skipped
+            batch = list(
+                QuizAttempt.objects.select_for_update(skip_locked=True)
+                .filter(status='ONGOING', end_time__lte=now)
+                .only('id', 'quiz_id', 'responses', 'end_time')
+                .order_by('end_time', 'id')[:batch_size]
+            )
+            if not batch:
+                break
+            fields = ['score', 'status', 'submitted_at']
+            if autosave.fold_pending(batch):
+                fields.append('responses')
+            for attempt in batch:
+                try:
+                    if attempt.quiz_id not in answer_keys:
+                        answer_keys[attempt.quiz_id] = get_answer_key(attempt.quiz_id)
+                    attempt.score = grade(answer_keys[attempt.quiz_id], attempt.responses)
+                    attempt.status = 'AUTO_SUBMITTED'
+                except Exception:
+                    # One unreadable attempt (or answer key) must not keep the rest of the batch open
+                    logger.exception("Could not grade quiz attempt %s; closed for manual grading", attempt.id)
+                    attempt.score = 0
+                    attempt.status = 'GRADING_FAILED'
+                attempt.submitted_at = attempt.end_time
+            # Only rows still ONGOING, so a submit or disqualification that got
+            # there first (e.g. where row locks are not supported) is kept
+            closed += QuizAttempt.objects.filter(status='ONGOING').bulk_update(batch, fields)
+        autosave.discard(batch)
+        if len(batch) < batch_size:
+            break
+    return closed
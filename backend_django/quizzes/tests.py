@@ -1,3 +1,250 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import MemberProfile, Role, User
+
+from .answer_key import get_answer_key, grade
+from .models import Quiz, Question, Option, QuizAttempt
+from .regrade import acquire_regrade, get_progress, regrade_quiz
+from .sweeper import sweep_expired_attempts
+
+
+def make_quiz(creator, **kwargs):
+    quiz = Quiz.objects.create(title="Quiz", creator=creator, join_code=kwargs.pop('join_code', 'JOIN1'), **kwargs)
+    question = Question.objects.create(quiz=quiz, text="2 + 2?", question_type='MCQ', marks=4, negative_marks=1)
+    right = Option.objects.create(question=question, text="4", is_correct=True)
+    wrong = Option.objects.create(question=question, text="5")
+    return quiz, question, right, wrong
+
+
+class AnswerKeyVersionTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', email='creator@example.com', password='x')
+        self.quiz, self.question, self.right, self.wrong = make_quiz(self.creator)
+
+    def test_edit_bumps_version_in_database(self):
+        before = Quiz.objects.get(id=self.quiz.id).content_version
+        self.wrong.is_correct = True
+        self.wrong.save()
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).content_version, before + 1)
+
+    def test_key_follows_option_edits(self):
+        responses = {str(self.question.id): [self.right.id]}
+        self.assertEqual(grade(get_answer_key(self.quiz.id), responses), 4)
+
+        self.right.is_correct = False
+        self.right.save()
+        self.wrong.is_correct = True
+        self.wrong.save()
+        self.assertEqual(grade(get_answer_key(self.quiz.id), responses), -1)
+
+
+class RegradeTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', email='creator@example.com', password='x')
+        self.quiz, self.question, self.right, self.wrong = make_quiz(self.creator)
+        self.attempt = QuizAttempt.objects.create(
+            quiz=self.quiz, status='SUBMITTED', score=4, responses={str(self.question.id): [self.right.id]},
+        )
+
+    def test_one_running_regrade_per_quiz(self):
+        run = acquire_regrade(self.quiz.id)
+        self.assertIsNone(acquire_regrade(self.quiz.id))
+        self.assertEqual(get_progress(self.quiz.id)['state'], 'running')
+        regrade_quiz(run)
+        self.assertIsNotNone(acquire_regrade(self.quiz.id))
+
+    def test_uses_current_key_even_if_cached_one_is_stale(self):
+        get_answer_key(self.quiz.id) # Cache the key before the edit
+        Option.objects.filter(id=self.right.id).update(is_correct=False) # No signal, no version bump
+        Option.objects.filter(id=self.wrong.id).update(is_correct=True)
+
+        result = regrade_quiz(acquire_regrade(self.quiz.id))
+        self.assertEqual(result['changed'], 1)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, -1)
+
+    def test_failure_is_recorded(self):
+        run = acquire_regrade(self.quiz.id)
+        with mock.patch('quizzes.regrade.grade', side_effect=ValueError("bad answer")):
+            with self.assertRaises(ValueError):
+                regrade_quiz(run)
+        progress = get_progress(self.quiz.id)
+        self.assertEqual(progress['state'], 'failed')
+        self.assertEqual(progress['error'], "bad answer")
+        self.assertIsNotNone(acquire_regrade(self.quiz.id))
+
+    def test_status_is_for_form_managers_only(self):
+        url = f'/api/quizzes/{self.quiz.id}/regrade_status/'
+        client = APIClient()
+        self.assertEqual(client.get(url).status_code, 401)
+        client.force_authenticate(User.objects.create_user(username='member', email='member@example.com'))
+        self.assertEqual(client.get(url).status_code, 403)
+
+        role = Role.objects.create(name='FORMS', can_manage_forms=True)
+        manager = User.objects.create_user(username='manager', email='manager@example.com')
+        manager.user_roles.add(role)
+        client.force_authenticate(manager)
+        response = client.get(url)
+        self.assertEqual((response.status_code, response.data), (200, {'state': 'idle'}))
+
+
+class SweeperTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', email='creator@example.com', password='x')
+        self.quiz, self.question, self.right, self.wrong = make_quiz(self.creator)
+
+    def _expired(self, responses, email):
+        return QuizAttempt.objects.create(
+            quiz=self.quiz, status='ONGOING', candidate_email=email, responses=responses,
+            end_time=timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_bad_attempt_does_not_stop_the_sweep(self):
+        bad = self._expired({str(self.question.id): ["abc"]}, 'bad@example.com')
+        good = self._expired({str(self.question.id): [self.right.id]}, 'good@example.com')
+
+        with self.assertLogs('quizzes.sweeper', 'ERROR'):
+            self.assertEqual(sweep_expired_attempts(), 2)
+        bad.refresh_from_db()
+        good.refresh_from_db()
+        self.assertEqual(bad.status, 'GRADING_FAILED')
+        self.assertEqual((good.status, good.score), ('AUTO_SUBMITTED', 4))
+
+    def test_broken_answer_key_only_fails_its_own_quiz(self):
+        other, other_question, other_right, _ = make_quiz(self.creator, join_code='JOIN2')
+        broken = self._expired({str(self.question.id): [self.right.id]}, 'broken@example.com')
+        good = QuizAttempt.objects.create(
+            quiz=other, status='ONGOING', candidate_email='good@example.com',
+            responses={str(other_question.id): [other_right.id]}, end_time=timezone.now() - timedelta(minutes=1),
+        )
+
+        def key_or_fail(quiz_id):
+            if quiz_id == self.quiz.id:
+                raise ValueError("corrupt key")
+            return get_answer_key(quiz_id)
+
+        with mock.patch('quizzes.sweeper.get_answer_key', side_effect=key_or_fail):
+            with self.assertLogs('quizzes.sweeper', 'ERROR'):
+                self.assertEqual(sweep_expired_attempts(), 2)
+        broken.refresh_from_db()
+        good.refresh_from_db()
+        self.assertEqual(broken.status, 'GRADING_FAILED')
+        self.assertEqual((good.status, good.score), ('AUTO_SUBMITTED', 4))
+
+    def test_does_not_overwrite_a_submit_that_got_there_first(self):
+        attempt = self._expired({str(self.question.id): [self.right.id]}, 'cand@example.com')
+
+        def disqualify_meanwhile(quiz_id):
+            QuizAttempt.objects.filter(id=attempt.id).update(status='DISQUALIFIED', score=0)
+            return get_answer_key(quiz_id)
+
+        with mock.patch('quizzes.sweeper.get_answer_key', side_effect=disqualify_meanwhile):
+            self.assertEqual(sweep_expired_attempts(), 0)
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.status, attempt.score), ('DISQUALIFIED', 0))
+
+
+class AutosaveValidationTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', email='creator@example.com', password='x')
+        self.quiz, self.question, self.right, self.wrong = make_quiz(self.creator)
+        self.essay = Question.objects.create(quiz=self.quiz, text="Why?", question_type='LONG', marks=10, negative_marks=0)
+        _, self.foreign_question, _, _ = make_quiz(self.creator, join_code='JOIN2')
+        QuizAttempt.objects.create(
+            quiz=self.quiz, status='ONGOING', candidate_email='cand@example.com',
+            end_time=timezone.now() + timedelta(minutes=30),
+        )
+        self.client = APIClient()
+
+    def _save(self, **payload):
+        return self.client.post(f'/api/quizzes/{self.quiz.id}/update_responses/',
+                                dict(payload, email='cand@example.com'), format='json')
+
+    def test_valid_answers_are_saved(self):
+        response = self._save(responses={str(self.question.id): [self.right.id], str(self.essay.id): ["Because"]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self._save(patch={str(self.question.id): None}).status_code, 200)
+
+    def test_invalid_answers_are_rejected(self):
+        for payload in (
+            {'patch': {str(self.question.id): ["abc"]}},
+            {'patch': {str(self.question.id): True}},
+            {'patch': {str(self.essay.id): [3]}},
+            {'patch': {'nonsense': [self.right.id]}},
+            {'responses': {str(self.foreign_question.id): [self.right.id]}},
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(self._save(**payload).status_code, 400)
+
+    def test_stats_are_for_form_managers_only(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/quizzes/autosave_stats/').status_code, 401)
+        client.force_authenticate(User.objects.create_user(username='member', email='member@example.com'))
+        self.assertEqual(client.get('/api/quizzes/autosave_stats/').status_code, 403)
+        client.force_authenticate(User.objects.create_user(username='admin', email='admin@example.com', is_superuser=True))
+        self.assertEqual(client.get('/api/quizzes/autosave_stats/').status_code, 200)
+
+
+class AttemptListQueryCountTests(TestCase):
+    """The admin responses page lists attempts with ?expand=user_details."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        self.quiz, _, _, _ = make_quiz(self.admin)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _add_attempts(self, n):
+        for _ in range(n):
+            i = QuizAttempt.objects.count()
+            user = User.objects.create_user(username=f'cand{i}', email=f'cand{i}@example.com')
+            MemberProfile.objects.create(user=user, full_name=f'Candidate {i}', position='Member')
+            QuizAttempt.objects.create(quiz=self.quiz, user=user, status='SUBMITTED')
+
+    def _count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/attempts/', {'quiz': self.quiz.id, 'expand': 'user_details'})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_expanded_list_query_count_is_independent_of_size(self):
+        self._add_attempts(2)
+        small, _ = self._count()
+        self._add_attempts(20)
+        large, response = self._count()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['results']), 22)
+        self.assertIn('permissions', response.data['results'][0]['user_details'])
+
+
+class JoinPaperTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', email='creator@example.com')
+        self.quiz, self.question, self.right, self.wrong = make_quiz(self.creator, is_active=True)
+        self.client = APIClient()
+
+    def _join(self, **headers):
+        return self.client.post('/api/quizzes/join_by_code/', {'code': 'JOIN1', 'email': 'cand@example.com'},
+                                format='json', **headers)
+
+    def test_join_embeds_the_paper_until_the_client_holds_it(self):
+        response = self._join()
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['quiz']['id'], self.quiz.id)
+        self.assertEqual(body['attempt']['candidate_email'], 'cand@example.com')
+
+        again = self._join(HTTP_IF_NONE_MATCH=response['X-Quiz-ETag'])
+        self.assertIsNone(again.json()['quiz'])
 
-# Create your tests here.
+    def test_quiz_deleted_mid_join_is_404(self):
+        with mock.patch('quizzes.views.get_paper', return_value=None):
+            self.assertEqual(self._join().status_code, 404)
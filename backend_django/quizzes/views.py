@@ -1,13 +1,28 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from django.utils import timezone
 from datetime import timedelta
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse
+import logging
+import threading
+import time
 from .models import Quiz, Question, Option, QuizAttempt
 from .serializers import QuizSerializer, QuestionSerializer, OptionSerializer, QuizAttemptSerializer, PublicQuizSerializer
-from users.permissions import GlobalPermission
+from users.permissions import CanManageForms, GlobalPermission
+from users.serializers import expanded_user_prefetches
+from .answer_key import check_answers, get_answer_key, grade
+from .regrade import acquire_regrade, regrade_quiz, get_progress as get_regrade_progress
+from core.caching import PublicResponseCacheMixin
+from . import autosave
+from .paper import get_paper
 
-class QuizViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class QuizViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('quizzes.Quiz', 'quizzes.Question', 'quizzes.Option', 'users.User', 'users.MemberProfile')
     queryset = Quiz.objects.all().order_by('-created_at')
     serializer_class = QuizSerializer
     permission_classes = [GlobalPermission]
@@ -71,24 +86,47 @@ class QuizViewSet(viewsets.ModelViewSet):
                  "requires_identity": not user
              })
 
-        return Response({
-            "quiz": PublicQuizSerializer(quiz).data,
-            "attempt": QuizAttemptSerializer(attempt).data
-        })
+        # A rejoining candidate sees answers that are still only buffered
+        attempt.responses = autosave.with_pending(attempt)
+        return self._join_response(request, quiz, attempt)
+
+    def _join_response(self, request, quiz, attempt):
+        # The paper is shared pre-encoded JSON; only the attempt is rendered here.
+        # A client that still holds the paper sends its ETag and gets "quiz": null.
+        paper = get_paper(quiz)
+        if paper is None:
+            # Deleted after the lookup above
+            return Response({"error": "Quiz not found"}, status=404)
+        quiz_body = b'null' if request.META.get('HTTP_IF_NONE_MATCH') == paper['etag'] else paper['body']
+        body = b''.join([
+            b'{"quiz":', quiz_body,
+            b',"attempt":', JSONRenderer().render(QuizAttemptSerializer(attempt).data),
+            b'}',
+        ])
+        response = HttpResponse(body, content_type='application/json')
+        response['X-Quiz-ETag'] = paper['etag']
+        return response
 
     def _get_attempt(self, request, quiz):
+        # quiz may be an instance or just its id; both lookups use a (quiz, ...) index
+        quiz_id = getattr(quiz, 'pk', quiz)
         user = request.user if request.user.is_authenticated else None
         if user:
-            return QuizAttempt.objects.filter(quiz=quiz, user=user).first()
+            return QuizAttempt.objects.filter(quiz_id=quiz_id, user=user).first()
         email = request.data.get('email')
         if email:
-            return QuizAttempt.objects.filter(quiz=quiz, candidate_email=email.lower()).first()
+            return QuizAttempt.objects.filter(quiz_id=quiz_id, candidate_email=email.lower()).first()
         return None
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def start_quiz(self, request, pk=None):
-        quiz = self.get_object()
-        attempt = self._get_attempt(request, quiz)
+        # Only the duration is needed, read from the row so an edit applies at once
+        duration = None
+        if str(pk).isdigit():
+            duration = Quiz.objects.filter(id=pk).values_list('duration_minutes', flat=True).first()
+        if duration is None:
+            return Response({"error": "Quiz not found"}, status=404)
+        attempt = self._get_attempt(request, pk)
         
         if not attempt:
             return Response({"error": "Join the quiz first"}, status=400)
@@ -101,8 +139,8 @@ class QuizViewSet(viewsets.ModelViewSet):
         
         attempt.status = 'ONGOING'
         attempt.start_time = timezone.now()
-        attempt.end_time = attempt.start_time + timedelta(minutes=quiz.duration_minutes)
-        attempt.save()
+        attempt.end_time = attempt.start_time + timedelta(minutes=duration)
+        attempt.save(update_fields=['questionnaire_data', 'status', 'start_time', 'end_time'])
         
         return Response(QuizAttemptSerializer(attempt).data)
 
@@ -115,76 +153,146 @@ class QuizViewSet(viewsets.ModelViewSet):
              return Response({"error": "No active session"}, status=400)
              
         is_disqualified = request.data.get('disqualified', False)
-        self._calculate_and_save(attempt, quiz, is_disqualified)
+        attempt = self._calculate_and_save(attempt, is_disqualified)
+        if attempt is None:
+            return Response({"error": "No active session"}, status=400)
         return Response(QuizAttemptSerializer(attempt).data)
 
-    def _calculate_and_save(self, attempt, quiz, is_disqualified=False):
-        if is_disqualified:
-            attempt.status = 'DISQUALIFIED'
-            attempt.score = 0
-        else:
-            total_score = 0
-            questions = quiz.questions.prefetch_related('options').all()
-            
-            for q in questions:
-                user_ans = attempt.responses.get(str(q.id), [])
-                if q.question_type in ['MCQ', 'MSQ']:
-                    correct_ans = list(q.options.filter(is_correct=True).values_list('id', flat=True))
-                    if not user_ans: continue
-                    if set(map(int, user_ans)) == set(correct_ans):
-                        total_score += q.marks
-                    else:
-                        total_score -= q.negative_marks
-                else:
-                    # Manual grading or neutral for now for short/long
-                    pass
-            
-            attempt.score = total_score
-            attempt.status = 'SUBMITTED'
-            
-        attempt.submitted_at = timezone.now()
-        attempt.save()
+    def _calculate_and_save(self, attempt, is_disqualified=False, auto=False):
+        """Grade and close the attempt. Returns the saved row, or None if it was closed meanwhile."""
+        with transaction.atomic():
+            # Row lock: the auto-submit sweeper skips locked rows, and a
+            # concurrent submit waits here and then finds the attempt closed
+            attempt = (
+                QuizAttempt.objects.select_for_update()
+                .filter(id=attempt.id, status__in=['ONGOING', 'STARTING'])
+                .first()
+            )
+            if attempt is None:
+                return None
+
+            fields = ['score', 'status', 'submitted_at']
+            if autosave.fold_pending([attempt]):
+                fields.append('responses')
+
+            if is_disqualified:
+                attempt.status = 'DISQUALIFIED'
+                attempt.score = 0
+            else:
+                # MCQ/MSQ only; short/long answers are graded manually
+                attempt.score = grade(get_answer_key(attempt.quiz_id), attempt.responses)
+                attempt.status = 'AUTO_SUBMITTED' if auto else 'SUBMITTED'
+
+            attempt.submitted_at = timezone.now()
+            attempt.save(update_fields=fields)
+        autosave.discard([attempt])
+        return attempt
+
+    @action(detail=True, methods=['post'])
+    def regrade(self, request, pk=None):
+        """
+        Re-score submitted attempts against the current answer key.
+        {"dry_run": true} returns the old/new score diff without saving;
+        otherwise the run happens in the background (poll regrade_status).
+        """
+        quiz = self.get_object()
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        run = acquire_regrade(quiz.id, dry_run=dry_run)
+        if run is None:
+            return Response({"error": "A regrade of this quiz is already running"}, status=409)
+
+        if dry_run:
+            return Response(regrade_quiz(run))
+
+        def work():
+            try:
+                result = regrade_quiz(run)
+                logger.info("Regraded quiz %s: %s of %s scores changed", quiz.id, result['changed'], result['total'])
+            except Exception:
+                logger.exception("Regrade of quiz %s failed", quiz.id)
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=work, name=f'regrade-{quiz.id}', daemon=True).start()
+        return Response({"status": "started"}, status=202)
+
+    @action(detail=True, methods=['get'], permission_classes=[CanManageForms])
+    def regrade_status(self, request, pk=None):
+        quiz = self.get_object()
+        return Response(get_regrade_progress(quiz.id) or {"state": "idle"})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def update_responses(self, request, pk=None):
-        quiz = self.get_object()
-        attempt = self._get_attempt(request, quiz)
-        
+        """
+        Autosave. {"responses": {...}} replaces every answer, {"patch": {question_id: answer}}
+        changes only those questions (null clears one). Writes are coalesced by quizzes.autosave.
+        """
+        started = time.perf_counter()
+        try:
+            return self._update_responses(request, pk)
+        finally:
+            autosave.record_latency(time.perf_counter() - started)
+
+    def _update_responses(self, request, pk):
+        # The attempt alone is enough; the quiz row is never loaded
+        attempt = self._get_attempt(request, pk) if str(pk).isdigit() else None
+
         if not attempt or attempt.status != 'ONGOING':
             return Response({"error": "Quiz session not ongoing"}, status=400)
             
         if attempt.time_left_seconds <= 0:
-            self._calculate_and_save(attempt, quiz)
+            # Normally the sweep_quiz_attempts command gets there first
+            self._calculate_and_save(attempt, auto=True)
             return Response({"error": "Time exceeded. Quiz auto-submitted."}, status=400)
             
         responses = request.data.get('responses')
-        if responses is not None:
-            attempt.responses = responses
-            attempt.save()
+        patch = request.data.get('patch')
+        if (responses is not None and not isinstance(responses, dict)) or (patch is not None and not isinstance(patch, dict)):
+            return Response({"error": "responses and patch must be objects keyed by question id"}, status=400)
+        try:
+            check_answers(attempt.quiz_id, {**(responses or {}), **(patch or {})})
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if responses is not None or patch:
+            autosave.save_responses(attempt, responses=responses, patch=patch)
             
         return Response({"status": "saved", "time_left": attempt.time_left_seconds})
 
+    @action(detail=False, methods=['get'], permission_classes=[CanManageForms])
+    def autosave_stats(self, request):
+        """Save latency percentiles (ms) and buffer counters for this worker."""
+        return Response(autosave.stats())
+
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Edited inline inside a quiz
 
 class OptionViewSet(viewsets.ModelViewSet):
     queryset = Option.objects.all()
     serializer_class = OptionSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Edited inline inside a question
 
 class QuizAttemptViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = QuizAttempt.objects.all()
     serializer_class = QuizAttemptSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-id',)
     
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return QuizAttempt.objects.none()
             
+        qs = QuizAttempt.objects.select_related('user__profile').prefetch_related(
+            'user__user_roles', *expanded_user_prefetches(self.request, {'user_details': 'user'})
+        )
+        quiz_id = self.request.query_params.get('quiz')
+        if quiz_id:
+            qs = qs.filter(quiz_id=quiz_id)
         if user.is_superuser or user.user_roles.filter(can_manage_forms=True).exists():
-            return QuizAttempt.objects.all()
+            return qs.all()
             
-        return QuizAttempt.objects.filter(user=user)
+        return qs.filter(user=user)
@@ -60,6 +60,7 @@ class RecruitmentDriveViewSet(viewsets.ModelViewSet):
 class TimelineEventViewSet(viewsets.ModelViewSet):
     queryset = TimelineEvent.objects.all()
     serializer_class = TimelineEventSerializer
+    pagination_class = None # Small per-drive list
     # permission_classes = [GlobalPermission] -> Moved to get_permissions
     
     def get_permissions(self):
@@ -94,6 +95,7 @@ class RecruitmentApplicationViewSet(viewsets.ModelViewSet):
 class RecruitmentAssignmentViewSet(viewsets.ModelViewSet):
     queryset = RecruitmentAssignment.objects.all()
     serializer_class = RecruitmentAssignmentSerializer
+    pagination_class = None # Small per-drive list
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -0,0 +1,137 @@
+"""
+Buffered AuditLog writer.
+
+``record_audit`` queues an event and returns immediately; a daemon thread
+bulk-inserts the queue once it holds AUDIT_LOG_BATCH_SIZE events or every
+AUDIT_LOG_FLUSH_INTERVAL seconds, and whatever is left is flushed at exit.
+If the buffer is full (database down) new events are dropped and counted.
+With AUDIT_LOG_SYNC every event is inserted straight away, which is what
+the test runner (core.test_runner) uses.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffer = deque()
+        self._thread = None
+        self._pid = None
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 100)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+
+    @property
+    def max_queue(self):
+        return getattr(settings, 'AUDIT_LOG_MAX_QUEUE', 10000)
+
+    def record(self, event_type, target, actor=None, ip_address=None, details="", success=True):
+        entry = {
+            'event_type': event_type,
+            'actor_id': actor.pk if actor is not None else None,
+            'target': str(target)[:255],
+            'ip_address': ip_address or None,
+            'details': str(details),
+            'success': success,
+            'created_at': timezone.now(),
+        }
+
+        if getattr(settings, 'AUDIT_LOG_SYNC', False):
+            with self._lock:
+                self.queued += 1
+            self._write([entry])
+            return
+
+        with self._lock:
+            if len(self._buffer) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._buffer.append(entry)
+            self.queued += 1
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Insert everything buffered so far. Returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'pending': len(self._buffer),
+            }
+
+    def _write(self, entries):
+        from .models import AuditLog
+        try:
+            AuditLog.objects.bulk_create([AuditLog(**e) for e in entries])
+        except Exception:
+            logger.exception("Dropping %d audit log entries", len(entries))
+            with self._lock:
+                self.dropped += len(entries)
+            return 0
+        with self._lock:
+            self.flushed += len(entries)
+        return len(entries)
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+            # Fresh process (e.g. a forked worker): the parent's thread did not come along
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+writer = AuditWriter()
+atexit.register(writer.flush)
+
+
+def record_audit(event_type, target, actor=None, ip_address=None, details="", success=True):
+    writer.record(event_type, target, actor=actor, ip_address=ip_address, details=details, success=success)
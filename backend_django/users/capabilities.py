@@ -0,0 +1,129 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+from core.caching import is_shared_cache
+
+CACHE_ALIAS = 'permissions'
+cache = ConnectionProxy(caches, CACHE_ALIAS)
+
+# Permission flags stored on Role. Everything that resolves "what may this user do"
+# works in terms of these names.
+ROLE_FLAGS = (
+    'can_manage_users',
+    'can_manage_projects',
+    'can_manage_events',
+    'can_manage_team',
+    'can_manage_gallery',
+    'can_manage_announcements',
+    'can_manage_security',
+    'can_manage_messages',
+    'can_manage_sponsorship',
+    'can_manage_forms',
+    'can_manage_content',
+)
+
+CAPABILITY_TIMEOUT = 60 * 10
+GENERATION_KEY = 'capabilities:generation'
+
+
+def role_capabilities(role):
+    """Flags granted by a single Role (plus the virtual sudo flag for WEB_LEAD)."""
+    perms = {flag for flag in ROLE_FLAGS if getattr(role, flag, False)}
+    if role.name == 'WEB_LEAD':
+        perms.add('can_manage_everything')
+    return perms
+
+
+def collect_capabilities(roles, position_role=None):
+    """Combine direct roles and the position-linked role into one flag set."""
+    perms = set()
+    for r in roles:
+        perms |= role_capabilities(r)
+    if position_role is not None:
+        perms |= role_capabilities(position_role)
+    if 'can_manage_security' in perms:
+        perms.add('can_manage_everything')
+    return frozenset(perms)
+
+
+def position_role_map():
+    """Lower-cased TeamPosition name -> linked Role (or None), loaded in one query."""
+    from .models import TeamPosition
+    roles = {}
+    for pos in TeamPosition.objects.select_related('role_link'):
+        roles.setdefault(pos.name.lower(), pos.role_link)
+    return roles
+
+
+def _position_role(user):
+    from .models import TeamPosition
+    profile = getattr(user, 'profile', None)
+    pos_name = getattr(profile, 'position', None) if profile else None
+    if not pos_name:
+        return None
+    pos = TeamPosition.objects.filter(name__iexact=pos_name).select_related('role_link').first()
+    return pos.role_link if pos else None
+
+
+def _cache_key(user_id):
+    generation = cache.get(GENERATION_KEY, 0)
+    return f"capabilities:{generation}:{user_id}"
+
+
+def compute_capabilities(user):
+    """Resolve the user's flags straight from the database (no caching)."""
+    try:
+        position_role = _position_role(user)
+    except Exception:
+        position_role = None
+    return collect_capabilities(user.user_roles.all(), position_role)
+
+
+def get_capabilities(user):
+    """
+    Full flag set for ``user``, resolved at most once per request.
+    The result is memoised on the user instance (request.user lives for one request)
+    and, when the permissions cache is shared by all workers, kept there by user id.
+    A per-process cache is skipped: a revoked role must stop working everywhere
+    at once, and the invalidating signal only reaches the process that ran it.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    perms = getattr(user, '_capabilities', None)
+    if perms is not None:
+        return perms
+
+    if not is_shared_cache(CACHE_ALIAS):
+        perms = compute_capabilities(user)
+        user._capabilities = perms
+        return perms
+
+    key = _cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        perms = compute_capabilities(user)
+        cache.set(key, list(perms), CAPABILITY_TIMEOUT)
+    else:
+        perms = frozenset(cached)
+
+    user._capabilities = perms
+    return perms
+
+
+def has_capability(user, flag):
+    return flag in get_capabilities(user)
+
+
+def invalidate_capabilities(user_id=None):
+    """
+    Drop cached flag sets. With a user id only that user is refreshed;
+    without one every cached entry is retired by bumping the generation.
+    """
+    if user_id is not None:
+        cache.delete(_cache_key(user_id))
+        return
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.retention import DEFAULT_BATCH_SIZE, apply_retention
+
+
+class Command(BaseCommand):
+    help = "Delete (and optionally archive) audit log rows past their retention policy (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Rows per DELETE (one PK range)")
+        parser.add_argument('--archive-dir', default=getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', ''),
+                            help="Write deleted rows to a gzip'd NDJSON file here first")
+        parser.add_argument('--no-archive', action='store_true',
+                            help="Skip archival even if AUDIT_LOG_ARCHIVE_DIR is set")
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to sleep between chunks")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many rows each policy would delete")
+
+    def handle(self, *args, **options):
+        report = apply_retention(
+            batch_size=options['batch_size'],
+            archive_dir=None if options['no_archive'] else options['archive_dir'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        for label, count in report['deleted'].items():
+            self.stdout.write(f"{verb} {count} audit logs ({label})")
+        if not report['deleted']:
+            self.stdout.write("No retention policy expires anything")
+        if report['archive']:
+            self.stdout.write(f"Archived to {report['archive']}")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:24
+
+from django.db import migrations, models
+import re
+
+
+def backfill_year_of_study(apps, schema_editor):
+    MemberProfile = apps.get_model('users', 'MemberProfile')
+    batch = []
+    for profile in MemberProfile.objects.exclude(year='').only('id', 'year').iterator(chunk_size=1000):
+        match = re.search(r'\d+', profile.year)
+        if match:
+            profile.year_of_study = int(match.group())
+            batch.append(profile)
+        if len(batch) >= 1000:
+            MemberProfile.objects.bulk_update(batch, ['year_of_study'])
+            batch = []
+    if batch:
+        MemberProfile.objects.bulk_update(batch, ['year_of_study'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_auditlog_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberprofile',
+            name='year_of_study',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='memberprofile',
+            name='sig',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.RunPython(backfill_year_of_study, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Must stay identical to the expression in users.views.filter_audit_logs, or
+# PostgreSQL will not use the index for audit log search.
+SEARCH_CONFIG = 'english'
+INDEX_NAME = 'auditlog_search_idx'
+
+
+def _search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('target', 'details', config=SEARCH_CONFIG), name=INDEX_NAME)
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('users', 'AuditLog'), _search_index())
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('users', 'AuditLog'), _search_index())
+
+
+class Migration(migrations.Migration):
+    """Full-text index for audit log search; PostgreSQL only (other backends use icontains)."""
+
+    dependencies = [
+        ('users', '0017_auditlog_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
@@ -1,5 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+import re
+
+def parse_year_of_study(value):
+    """'2nd Year' / '2' / 2 -> 2; anything without a number -> None."""
+    match = re.search(r'\d+', str(value or ''))
+    return int(match.group()) if match else None
 
 # 1. Dynamic SIG Model
 class Sig(models.Model):
@@ -90,7 +97,7 @@ class MemberProfile(models.Model):
     department = models.CharField(max_length=100, blank=True) 
     year_of_joining = models.IntegerField(null=True, blank=True)
     
-    sig = models.CharField(max_length=100, blank=True) 
+    sig = models.CharField(max_length=100, blank=True, db_index=True) 
     sigs = models.ManyToManyField('Sig', blank=True, related_name='members') 
     position = models.CharField(max_length=100, blank=True) 
     team_name = models.CharField(max_length=100, blank=True) 
@@ -108,6 +115,7 @@ class MemberProfile(models.Model):
     email = models.EmailField(blank=True) 
     
     year = models.CharField(max_length=50, blank=True) 
+    year_of_study = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, editable=False) # Parsed from 'year'
     branch = models.CharField(max_length=100, blank=True) 
 
     custom_fields = models.JSONField(default=dict, blank=True)
@@ -115,6 +123,13 @@ class MemberProfile(models.Model):
     class Meta:
         ordering = ['order', 'full_name']
 
+    def save(self, *args, **kwargs):
+        self.year_of_study = parse_year_of_study(self.year)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'year' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'year_of_study'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.full_name}"
 
@@ -126,10 +141,16 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     details = models.TextField(blank=True) # JSON or text summary
     success = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False) # Set when queued, not when flushed
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='auditlog_created_idx'),
+            models.Index(fields=['event_type', '-created_at'], name='auditlog_event_created_idx'),
+            models.Index(fields=['actor', '-created_at'], name='auditlog_actor_created_idx'),
+            models.Index(fields=['ip_address', '-created_at'], name='auditlog_ip_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.event_type} by {self.actor} at {self.created_at}"
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .capabilities import has_capability
 
 class GlobalPermission(permissions.BasePermission):
     """
@@ -59,23 +60,9 @@ class GlobalPermission(permissions.BasePermission):
             return True
 
         # Helper: check for specific flag across all sources
+        # (direct roles + Role linked to the user's Position, resolved once per request)
         def check_flag(flag_name):
-            # A. Check explicitly assigned roles
-            if user.user_roles.filter(**{flag_name: True}).exists():
-                return True
-            
-            # B. Check Role linked to user's Position (Structure Management)
-            try:
-                from .models import TeamPosition
-                profile = getattr(user, 'profile', None)
-                pos_name = getattr(profile, 'position', None) if profile else None
-                if pos_name:
-                    pos = TeamPosition.objects.filter(name__iexact=pos_name).first()
-                    if pos and pos.role_link and getattr(pos.role_link, flag_name):
-                        return True
-            except: pass
-            
-            return False
+            return has_capability(user, flag_name)
             
         # 3. Web Lead / Security Manager check (Full Access)
         if check_flag('can_manage_security'):
@@ -159,3 +146,14 @@ class IsWebLead(permissions.BasePermission):
         if not request.user.is_authenticated: return False
         if request.user.is_superuser: return True
         return request.user.user_roles.filter(can_manage_security=True).exists()
+
+class CanManageForms(permissions.BasePermission):
+    """
+    Reads that expose form/quiz internals. Same flags GlobalPermission asks
+    for when writing to FormViewSet / QuizViewSet.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated: return False
+        if user.is_superuser: return True
+        return any(has_capability(user, flag) for flag in ('can_manage_forms', 'can_manage_content', 'can_manage_security'))
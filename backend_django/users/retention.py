@@ -0,0 +1,113 @@
+"""
+Audit log retention, run by ``manage.py apply_audit_retention``.
+
+Policies map an event_type to a number of days to keep (None = forever);
+the 'default' entry covers every type without its own policy. Expired rows
+are removed in primary-key ranges of ``batch_size`` rows, each range its own
+short autocommit DELETE, so the table is never locked for the whole sweep
+and the audit writer's inserts (which land at the top of the PK range)
+proceed alongside. With an archive directory each range is appended to a
+gzip'd NDJSON file before it is deleted.
+"""
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import AuditLog
+
+DEFAULT_BATCH_SIZE = 1000
+ARCHIVE_FIELDS = ('id', 'event_type', 'actor_id', 'target', 'ip_address', 'details', 'success', 'created_at')
+
+
+def retention_policies():
+    return dict(getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', {'default': None}))
+
+
+class NDJSONArchive:
+    """One compressed NDJSON file per run, opened on first write."""
+
+    def __init__(self, directory, now=None):
+        now = now or timezone.now()
+        self.path = Path(directory) / f"auditlog-{now:%Y%m%d-%H%M%S}.ndjson.gz"
+        self.rows = 0
+        self._file = None
+
+    def write(self, queryset):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in queryset.values(*ARCHIVE_FIELDS).order_by('id').iterator():
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            self.rows += 1
+        # On disk before the rows are deleted
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def purge_range(queryset, batch_size=DEFAULT_BATCH_SIZE, archive=None, pause=0):
+    """Delete ``queryset`` in ascending PK ranges. Returns rows deleted."""
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        chunk = queryset.filter(id__gte=ids[0], id__lte=ids[-1])
+        if archive is not None:
+            archive.write(chunk)
+        deleted += chunk.delete()[0]
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def expired_querysets(policies=None, now=None):
+    """(label, queryset of expired rows) for each policy that expires anything."""
+    policies = retention_policies() if policies is None else dict(policies)
+    now = now or timezone.now()
+    default_days = policies.pop('default', None)
+
+    for event_type, days in policies.items():
+        if days is not None:
+            yield event_type, AuditLog.objects.filter(
+                event_type=event_type, created_at__lt=now - timedelta(days=days)
+            )
+    if default_days is not None:
+        yield 'default', AuditLog.objects.exclude(event_type__in=list(policies)).filter(
+            created_at__lt=now - timedelta(days=default_days)
+        )
+
+
+def apply_retention(policies=None, now=None, batch_size=DEFAULT_BATCH_SIZE, archive_dir=None, pause=0, dry_run=False):
+    """
+    Run every policy once. Returns {label: rows deleted (or that would be)}
+    plus the archive path when one was written.
+    """
+    now = now or timezone.now()
+    archive = NDJSONArchive(archive_dir, now) if archive_dir and not dry_run else None
+    report = {'deleted': {}, 'archive': None}
+    try:
+        for label, expired in expired_querysets(policies, now):
+            if dry_run:
+                report['deleted'][label] = expired.count()
+            else:
+                report['deleted'][label] = purge_range(expired, batch_size, archive, pause)
+    finally:
+        if archive is not None:
+            archive.close()
+            if archive.rows:
+                report['archive'] = str(archive.path)
+    return report
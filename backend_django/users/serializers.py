@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Prefetch, prefetch_related_objects
 from .models import Role, MemberProfile, Sig, ProfileFieldDefinition, TeamPosition, AuditLog
+from .capabilities import collect_capabilities, position_role_map
 
 User = get_user_model()
 
@@ -43,6 +46,28 @@ class MemberProfileSerializer(serializers.ModelSerializer):
         model = MemberProfile
         fields = '__all__'
 
+def user_prefetches(path=''):
+    """Prefetch lookups for everything UserSerializer touches on the users at ``path``."""
+    from projects.models import Project
+    prefix = f'{path}__' if path else ''
+    slim_projects = Project.objects.only('id', 'title')
+    return [
+        f'{prefix}user_roles',
+        f'{prefix}profile__sigs',
+        Prefetch(f'{prefix}led_projects', queryset=slim_projects),
+        Prefetch(f'{prefix}projects', queryset=slim_projects),
+    ]
+
+def prefetch_user_relations(users):
+    """Load everything UserSerializer touches for a batch of users in a fixed number of queries."""
+    prefetch_related_objects(users, *user_prefetches())
+
+class UserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        prefetch_user_relations(users)
+        return super().to_representation(users)
+
 class UserSerializer(serializers.ModelSerializer):
     user_roles = RoleSerializer(many=True, read_only=True)
     profile = MemberProfileSerializer(read_only=True)
@@ -52,49 +77,109 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'role', 'user_roles', 'profile', 'is_active', 'permissions', 'projects_info', 'last_login')
+        list_serializer_class = UserListSerializer
 
     def get_projects_info(self, obj):
         return {
-            'led': list(obj.led_projects.values('id', 'title')),
-            'member': list(obj.projects.values('id', 'title'))
+            'led': [{'id': p.id, 'title': p.title} for p in obj.led_projects.all()],
+            'member': [{'id': p.id, 'title': p.title} for p in obj.projects.all()]
         }
 
     def get_permissions(self, obj):
-        perms = set()
-        
-        # 1. Direct Roles
-        for r in obj.user_roles.all():
-            self._add_role_perms(r, perms)
-            
-        # 2. Position-Linked Roles (NEW)
-        try:
-            if hasattr(obj, 'profile') and obj.profile and obj.profile.position:
-                # Try to find Position by name
-                # Ideally user.profile.position would be a ForeignKey, but legacy string support
-                pos = TeamPosition.objects.filter(name__iexact=obj.profile.position).select_related('role_link').first()
-                if pos and pos.role_link:
-                    self._add_role_perms(pos.role_link, perms)
-                    # Add role name to perms for frontend visibility checks
-                    if pos.role_link.name == 'WEB_LEAD': perms.add('can_manage_everything') 
-        except Exception: 
-            pass
-
-        # 3. Virtual Sudo Permission
-        if 'can_manage_security' in perms:
-            perms.add('can_manage_everything')
-
-        return list(perms)
-
-    def _add_role_perms(self, r, perms):
-        if r.can_manage_users: perms.add('can_manage_users')
-        if r.can_manage_projects: perms.add('can_manage_projects')
-        if r.can_manage_events: perms.add('can_manage_events')
-        if r.can_manage_team: perms.add('can_manage_team')
-        if r.can_manage_gallery: perms.add('can_manage_gallery')
-        if r.can_manage_announcements: perms.add('can_manage_announcements')
-        if r.can_manage_security: perms.add('can_manage_security')
-        if r.can_manage_messages: perms.add('can_manage_messages')
-        if r.can_manage_sponsorship: perms.add('can_manage_sponsorship')
-        if r.can_manage_forms: perms.add('can_manage_forms')
-        if r.can_manage_content: perms.add('can_manage_content')
-        if r.name == 'WEB_LEAD': perms.add('can_manage_everything')  
+        # Direct Roles + Position-Linked Role (+ virtual 'can_manage_everything')
+        position_role = None
+        profile = getattr(obj, 'profile', None)
+        if profile and profile.position:
+            # Legacy string match: user.profile.position is not a ForeignKey
+            position_role = self._position_roles().get(profile.position.lower())
+        return list(collect_capabilities(obj.user_roles.all(), position_role))
+
+    def _position_roles(self):
+        # Loaded once and shared by every (nested) UserSerializer in this serialization pass
+        roles = self.context.get('_position_roles')
+        if roles is None:
+            roles = position_role_map()
+            self.context['_position_roles'] = roles
+        return roles
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user card for nested contexts (no roles, permissions or project lookups)."""
+    full_name = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'full_name', 'image', 'position', 'last_login')
+
+    def get_full_name(self, obj):
+        profile = getattr(obj, 'profile', None)
+        return profile.full_name if profile else ''
+
+    def get_image(self, obj):
+        profile = getattr(obj, 'profile', None)
+        if not profile or not profile.image:
+            return None
+        request = self.context.get('request')
+        url = profile.image.url
+        return request.build_absolute_uri(url) if request else url
+
+    def get_position(self, obj):
+        profile = getattr(obj, 'profile', None)
+        return profile.position if profile else ''
+
+def requested_expansions(request):
+    """Field names listed in ?expand=a,b."""
+    raw = request.query_params.get('expand', '') if request is not None and hasattr(request, 'query_params') else ''
+    return {f.strip() for f in raw.split(',') if f.strip()}
+
+def expanded_fields(context):
+    """Field names requested in full via ?expand=a,b ('users' expands every nested user)."""
+    expanded = context.get('_expand')
+    if expanded is None:
+        expanded = requested_expansions(context.get('request'))
+        context['_expand'] = expanded
+    return expanded
+
+def expanded_user_prefetches(request, fields):
+    """
+    Prefetch lookups for the nested user fields of a list view that ?expand=
+    renders in full. ``fields`` maps field name -> relation path, e.g.
+    {'user_details': 'user'}. Many-valued fields batch themselves
+    (NestedUserListSerializer); single ones need this on the outer queryset.
+    """
+    expanded = requested_expansions(request)
+    lookups = []
+    for name, path in fields.items():
+        if 'users' in expanded or name in expanded:
+            lookups += user_prefetches(path)
+    return lookups
+
+class NestedUserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if self.child.is_expanded():
+            prefetch_user_relations(users)
+        return super().to_representation(users)
+
+class NestedUserSerializer(UserSummarySerializer):
+    """
+    Nested user field: UserSummarySerializer by default, the full UserSerializer
+    when the field is listed in ?expand= (e.g. ?expand=members_details,author_details).
+    """
+    class Meta(UserSummarySerializer.Meta):
+        list_serializer_class = NestedUserListSerializer
+
+    def is_expanded(self):
+        expanded = expanded_fields(self.context)
+        if not expanded:
+            return False
+        name = self.parent.field_name if isinstance(self.parent, serializers.ListSerializer) else self.field_name
+        return 'users' in expanded or name in expanded
+
+    def to_representation(self, instance):
+        if self.is_expanded():
+            if not hasattr(self, '_full'):
+                self._full = UserSerializer(context=self.context)
+            return self._full.to_representation(instance)
+        return super().to_representation(instance)
@@ -1,11 +1,15 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import AuditLog
+from .models import Role, TeamPosition, MemberProfile, User, Sig
+from .capabilities import invalidate_capabilities
+from .audit import record_audit
+from .team_directory import invalidate_directory
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
-    ip = request.META.get('REMOTE_ADDR')
-    AuditLog.objects.create(
+    ip = request.META.get('REMOTE_ADDR') if request else None
+    record_audit(
         event_type="USER_LOGIN",
         actor=user,
         target=f"User Login: {user.username}",
@@ -16,11 +20,56 @@ def log_user_login(sender, request, user, **kwargs):
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
     if user:
-        ip = request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
+        ip = request.META.get('REMOTE_ADDR') if request else None
+        record_audit(
             event_type="USER_LOGOUT",
             actor=user,
             target=f"User Logout: {user.username}",
             ip_address=ip,
             details="User logged out successfully"
         )
+
+# --- Capability cache invalidation ---
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=TeamPosition)
+def invalidate_all_capabilities(sender, **kwargs):
+    invalidate_capabilities()
+
+@receiver([post_save, post_delete], sender=MemberProfile)
+def invalidate_profile_capabilities(sender, instance, **kwargs):
+    if instance.user_id:
+        invalidate_capabilities(instance.user_id)
+
+@receiver(m2m_changed, sender=User.user_roles.through)
+def invalidate_user_role_capabilities(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_capabilities(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_capabilities(user_id)
+    else:
+        # Role.users.clear(): affected users are unknown at this point
+        invalidate_capabilities()
+
+# --- Public team directory invalidation ---
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_directory_for_user(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the directory does not show
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_directory()
+
+@receiver([post_save, post_delete], sender=MemberProfile)
+@receiver([post_save, post_delete], sender=Sig)
+@receiver([post_save, post_delete], sender=TeamPosition)
+def invalidate_directory_for_structure(sender, **kwargs):
+    invalidate_directory()
+
+@receiver(m2m_changed, sender=MemberProfile.sigs.through)
+def invalidate_directory_for_sigs(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_directory()
@@ -0,0 +1,101 @@
+"""
+Public team directory served by PublicTeamView.
+
+The page is rendered once per (member type, grouping, site origin), stored
+in the cache as encoded JSON together with its ETag, and reused until a
+User, MemberProfile, Sig or TeamPosition change (users.signals) bumps the
+generation number. Only public profile fields are included. The bump only
+reaches the cache it runs against, so with a per-process cache a rendered
+page is kept for LOCAL_DIRECTORY_TIMEOUT instead.
+"""
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.connection import ConnectionProxy
+
+from core.caching import is_shared_cache
+
+cache = ConnectionProxy(caches, 'responses')
+
+GENERATION_KEY = 'team_directory:generation'
+DIRECTORY_TIMEOUT = 60 * 60 * 6
+LOCAL_DIRECTORY_TIMEOUT = 30
+GROUPINGS = ('sig', 'position')
+GENERAL_GROUP = "General Members"
+
+PUBLIC_PROFILE_FIELDS = (
+    'full_name', 'department', 'sig', 'position', 'team_name', 'is_alumni', 'order',
+    'description', 'linkedin_url', 'github_url', 'instagram_url', 'year', 'branch',
+)
+
+
+def _member(user, base_url):
+    profile = user.profile
+    data = {f: getattr(profile, f) for f in PUBLIC_PROFILE_FIELDS}
+    url = profile.image.url if profile.image else None
+    data['image'] = base_url + url if url and '://' not in url else url
+    data['sigs'] = [{'id': s.id, 'name': s.name} for s in profile.sigs.all()]
+    return {'id': user.id, 'username': user.username, 'profile': data}
+
+
+def _group(members, group_by):
+    from .models import Sig, TeamPosition
+
+    buckets = {}
+    for m in members:
+        p = m['profile']
+        if group_by == 'sig':
+            names = [p['sig']] if p['sig'] else []
+            names += [s['name'] for s in p['sigs'] if s['name'] not in names]
+            names = names or [GENERAL_GROUP]
+        else:
+            names = [p['position'] or 'Member']
+        for name in names:
+            buckets.setdefault(name, []).append(m)
+
+    # Structure order first (Sig.order / TeamPosition.rank), anything else alphabetically
+    model = Sig if group_by == 'sig' else TeamPosition
+    ordered = [n for n in model.objects.values_list('name', flat=True) if n in buckets]
+    ordered += sorted(n for n in buckets if n not in ordered)
+    return [{'group': name, 'members': buckets[name]} for name in ordered]
+
+
+def build_directory(member_type='current', group_by=None, base_url=''):
+    from .models import User
+
+    users = (
+        User.objects.filter(is_active=True, profile__is_public=True,
+                            profile__is_alumni=(member_type == 'alumni'))
+        .select_related('profile').prefetch_related('profile__sigs')
+        .order_by('profile__order', 'profile__full_name')
+    )
+    members = [_member(u, base_url) for u in users]
+    return _group(members, group_by) if group_by in GROUPINGS else members
+
+
+def _cache_key(member_type, group_by, base_url):
+    generation = cache.get(GENERATION_KEY, 0)
+    return f"team_directory:{generation}:{member_type}:{group_by or 'flat'}:{base_url}"
+
+
+def get_directory(member_type='current', group_by=None, base_url=''):
+    """(encoded JSON body, ETag) for the requested view of the directory."""
+    # Unknown groupings render the flat list; never give them cache entries of their own
+    group_by = group_by if group_by in GROUPINGS else None
+    key = _cache_key(member_type, group_by, base_url)
+    cached = cache.get(key)
+    if cached is None:
+        body = json.dumps(build_directory(member_type, group_by, base_url), cls=DjangoJSONEncoder).encode('utf-8')
+        cached = (body, '"%s"' % hashlib.md5(body).hexdigest())
+        timeout = DIRECTORY_TIMEOUT if is_shared_cache('responses') else LOCAL_DIRECTORY_TIMEOUT
+        cache.set(key, cached, timeout)
+    return cached
+
+
+def invalidate_directory():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
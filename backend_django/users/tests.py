@@ -1,3 +1,244 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import skipIf
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .audit import AuditWriter
+from .models import AuditLog, MemberProfile, Role, User
+from .retention import apply_retention, purge_range
+from .views import filter_audit_logs
+
+
+class CapabilityRevocationTests(TestCase):
+    """A revoked role must stop granting access on the very next request."""
+
+    def setUp(self):
+        for c in caches.all():
+            c.clear()
+        self.user = User.objects.create_user('auditor')
+        self.role = Role.objects.create(name='AUDITOR', can_manage_security=True)
+        self.user.user_roles.add(self.role)
+        self.client = APIClient()
+
+    def _allowed(self):
+        # A fresh instance per request, like the authentication backend gives
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        return self.client.get('/api/cache/health/').status_code != 403
+
+    def _check_revocations(self):
+        self.assertTrue(self._allowed())
+        self.user.user_roles.remove(self.role)
+        self.assertFalse(self._allowed())
+
+        self.user.user_roles.add(self.role)
+        self.assertTrue(self._allowed())
+        self.role.can_manage_security = False
+        self.role.save()
+        self.assertFalse(self._allowed())
+
+    def test_revocation_with_per_process_cache(self):
+        self._check_revocations()
+
+    def test_revocation_with_shared_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory}
+            with override_settings(CACHES=dict(caches.settings, permissions=shared)):
+                self._check_revocations()
+
+
+class PublicTeamGroupingTests(TestCase):
+    def test_unknown_grouping_is_rejected(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/team/public/', {'group_by': 'sig'}).status_code, 200)
+        self.assertEqual(client.get('/api/team/public/', {'group_by': 'nonsense'}).status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', email='admin@example.com', is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _rows(self, response):
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        return list(csv.reader(io.StringIO(body.decode())))
+
+    def test_user_export_streams_header_and_rows(self):
+        member = User.objects.create_user('member', email='member@example.com')
+        MemberProfile.objects.create(user=member, full_name='Member One', sig='Robotics')
+        response = self.client.get('/api/management/export_csv/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="users.csv"', response['Content-Disposition'])
+        rows = self._rows(response)
+        self.assertEqual(rows[0], ['Username', 'Email', 'Full Name', 'Role', 'Team Position', 'SIG', 'Status'])
+        self.assertEqual([r[0] for r in rows[1:]], ['admin', 'member'])
+        self.assertEqual(rows[2][2], 'Member One')
+        self.assertEqual(rows[2][5], 'Robotics')
+
+    def test_audit_export_applies_the_list_filters(self):
+        AuditLog.objects.create(event_type='LOGIN', actor=self.admin, target='login')
+        AuditLog.objects.create(event_type='USER_DELETED', actor=self.admin, target='Deleted user bob')
+        rows = self._rows(self.client.get('/api/audit-logs/export_csv/', {'event_type': 'USER_DELETED'}))
+        self.assertEqual(rows[0][0], 'Event Type')
+        self.assertEqual([(r[0], r[1], r[2]) for r in rows[1:]], [('USER_DELETED', 'admin', 'Deleted user bob')])
+
+        response = self.client.get('/api/audit-logs/export_csv/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ndjson_and_gzip_outputs(self):
+        AuditLog.objects.create(event_type='LOGIN', actor=None, target='login')
+        response = self.client.get('/api/audit-logs/export_csv/', {'output': 'ndjson', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="audit_logs.ndjson.gz"', response['Content-Disposition'])
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        record = json.loads(lines[0])
+        self.assertEqual((record['Event Type'], record['Actor']), ('LOGIN', 'System/Proton'))
+
+
+@override_settings(AUDIT_LOG_SYNC=False, AUDIT_LOG_BATCH_SIZE=3, AUDIT_LOG_FLUSH_INTERVAL=60, AUDIT_LOG_MAX_QUEUE=5)
+class AuditWriterTests(TransactionTestCase):
+    """The buffered writer inserts from its own thread (and connection), hence TransactionTestCase."""
+
+    def setUp(self):
+        self.writer = AuditWriter()
+
+    def _wait_for_rows(self, count):
+        deadline = time.monotonic() + 5
+        while AuditLog.objects.count() < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return AuditLog.objects.count()
+
+    def test_full_batch_is_written_by_the_background_thread(self):
+        actor = User.objects.create_user('actor')
+        for i in range(3):
+            self.writer.record('LOGIN', f'login {i}', actor=actor, ip_address='127.0.0.1')
+        self.assertEqual(self._wait_for_rows(3), 3)
+        self.assertEqual(set(AuditLog.objects.values_list('actor_id', flat=True)), {actor.id})
+        self.assertEqual(self.writer.stats(), {'queued': 3, 'flushed': 3, 'dropped': 0, 'pending': 0})
+
+    def test_flush_at_shutdown_writes_a_partial_batch(self):
+        self.writer.record('LOGIN', 'one')
+        self.writer.record('LOGIN', 'two')
+        # Below the batch size and long before the interval: still buffered
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(self.writer.stats()['pending'], 2)
+
+        self.assertEqual(self.writer.flush(), 2)  # What atexit runs
+        self.assertEqual(sorted(AuditLog.objects.values_list('target', flat=True)), ['one', 'two'])
+        self.assertEqual(self.writer.flush(), 0)
+
+    def test_events_beyond_the_queue_limit_are_dropped(self):
+        self.writer._ensure_thread = lambda: None  # Keep everything in the buffer
+        for i in range(7):
+            self.writer.record('LOGIN', f'login {i}')
+        self.assertEqual(self.writer.stats(), {'queued': 5, 'flushed': 0, 'dropped': 2, 'pending': 5})
+        self.assertEqual(self.writer.flush(), 5)
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+
+class AuditLogFilterTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        now = timezone.now()
+        self.old = AuditLog.objects.create(event_type='LOGIN', actor=self.alice, target='Login alice',
+                                           ip_address='10.0.0.1', created_at=now - timedelta(days=10))
+        self.deleted = AuditLog.objects.create(event_type='USER_DELETED', actor=self.bob, target='Deleted user carol',
+                                               details='Removed from robotics', created_at=now - timedelta(days=1))
+        self.modified = AuditLog.objects.create(event_type='USER_MODIFIED', actor=self.alice, target='Modified user dave',
+                                                details='Password updated', created_at=now)
+
+    def _filter(self, **params):
+        return set(filter_audit_logs(AuditLog.objects.all(), params))
+
+    def test_event_type_accepts_one_or_several(self):
+        self.assertEqual(self._filter(event_type='LOGIN'), {self.old})
+        self.assertEqual(self._filter(eventType='LOGIN,USER_DELETED'), {self.old, self.deleted})
+
+    def test_actor_by_id_or_username(self):
+        self.assertEqual(self._filter(actor=str(self.bob.id)), {self.deleted})
+        self.assertEqual(self._filter(actor='alice'), {self.old, self.modified})
+        self.assertEqual(self._filter(ip='10.0.0.1'), {self.old})
+
+    def test_date_bounds(self):
+        two_days_ago = (timezone.now() - timedelta(days=2)).isoformat()
+        self.assertEqual(self._filter(since=two_days_ago), {self.deleted, self.modified})
+        self.assertEqual(self._filter(until=two_days_ago), {self.old})
+        self.assertEqual(self._filter(since=timezone.localdate().isoformat()), {self.modified})
+        with self.assertRaises(ValueError):
+            self._filter(since='last week')
+
+    @skipIf(connection.vendor == 'postgresql', 'Full-text search on PostgreSQL')
+    def test_search_falls_back_to_substring_match_off_postgres(self):
+        # Every term must match the target or the details
+        self.assertEqual(self._filter(search='user robotics'), {self.deleted})
+        self.assertEqual(self._filter(search='PASSWORD'), {self.modified})
+        self.assertEqual(self._filter(search='  '), {self.old, self.deleted, self.modified})
+
+    def test_list_reports_malformed_filters(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', is_superuser=True))
+        self.assertEqual(client.get('/api/audit-logs/', {'ip': 'not-an-ip'}).status_code, 400)
+
+
+@override_settings(AUDIT_LOG_RETENTION_DAYS={'default': 30, 'LOGIN': 7, 'SECURITY_ALERT': None})
+class AuditRetentionTests(TestCase):
+    def _log(self, event_type, days_ago):
+        return AuditLog.objects.create(event_type=event_type, target=f'{event_type} {days_ago}d',
+                                       created_at=timezone.now() - timedelta(days=days_ago))
+
+    def setUp(self):
+        self.recent_login = self._log('LOGIN', 3)
+        self.old_login = self._log('LOGIN', 10)
+        self.recent_other = self._log('USER_MODIFIED', 10)
+        self.old_other = self._log('USER_MODIFIED', 40)
+        self.ancient_alert = self._log('SECURITY_ALERT', 400)
+
+    def test_per_type_policies_override_the_default(self):
+        report = apply_retention()
+        self.assertEqual(report, {'deleted': {'LOGIN': 1, 'default': 1}, 'archive': None})
+        self.assertEqual(set(AuditLog.objects.all()), {self.recent_login, self.recent_other, self.ancient_alert})
+
+    def test_dry_run_only_counts(self):
+        report = apply_retention(dry_run=True)
+        self.assertEqual(report['deleted'], {'LOGIN': 1, 'default': 1})
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_rows_are_archived_before_they_are_deleted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = io.StringIO()
+            call_command('apply_audit_retention', archive_dir=directory, stdout=out)
+            archives = list(Path(directory).glob('auditlog-*.ndjson.gz'))
+            self.assertEqual(len(archives), 1)
+            with gzip.open(archives[0], 'rt') as f:
+                archived = [json.loads(line) for line in f]
+        self.assertEqual({r['id'] for r in archived}, {self.old_login.id, self.old_other.id})
+        self.assertEqual(archived[0]['event_type'], 'LOGIN')
+        self.assertIn('Archived to', out.getvalue())
+        self.assertFalse(AuditLog.objects.filter(id__in=[self.old_login.id, self.old_other.id]).exists())
+
+    def test_purge_range_deletes_in_chunks(self):
+        AuditLog.objects.bulk_create([
+            AuditLog(event_type='BULK', target=str(i), created_at=timezone.now()) for i in range(7)
+        ])
+        bulk = AuditLog.objects.filter(event_type='BULK')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(purge_range(bulk, batch_size=3), 7)
+        deletes = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)  # 3 + 3 + 1
+        self.assertFalse(bulk.exists())
+        self.assertEqual(AuditLog.objects.count(), 5)
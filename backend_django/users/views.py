@@ -1,28 +1,36 @@
-from rest_framework import generics, permissions, status, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import transaction, connection
+from django.db.models import Q
 from .models import Role, MemberProfile, Sig, ProfileFieldDefinition, TeamPosition, AuditLog
 from .serializers import (
     UserSerializer, RoleSerializer, MemberProfileSerializer, 
     SigSerializer, ProfileFieldDefinitionSerializer, TeamPositionSerializer, AuditLogSerializer
 )
 from .permissions import GlobalPermission
+from .audit import record_audit, writer as audit_writer
+from .retention import purge_range
+from .team_directory import GROUPINGS, get_directory, invalidate_directory
+import ipaddress
 import json
-import csv
+from core.exports import export_response, iter_rows
+from core.caching import PublicResponseCacheMixin, bump_model_version
 from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, timedelta
 
 User = get_user_model()
 
 # --- HELPER: AUDIT LOGGER ---
 def log_audit(request, event, target, details=""):
+    # Queued; users.audit bulk-inserts off the request path
     try:
         ip = request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
+        record_audit(
             event_type=event,
             actor=request.user if request.user.is_authenticated else None,
             target=target,
@@ -33,29 +41,102 @@ def log_audit(request, event, target, details=""):
 
 # --- VIEWSETS ---
 
+# Text search configuration of the audit log GIN index
+AUDIT_SEARCH_CONFIG = 'english'
+
+def _parse_time_bound(value):
+    # ISO timestamp, or a bare date meaning midnight (server time zone)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date/time {value!r}")
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def filter_audit_logs(qs, params):
+    """
+    Filters shared by the audit list and export. Each one is served by an
+    index on (<column>, created_at):
+      event_type=A,B  actor=<id|username>  ip=<address>
+      since=<iso>  until=<iso>  search=<words in target/details>
+    Raises ValueError for malformed values.
+    """
+    event_type = params.get('event_type') or params.get('eventType')
+    if event_type:
+        types = [t for t in event_type.split(',') if t]
+        qs = qs.filter(event_type__in=types) if len(types) > 1 else qs.filter(event_type=types[0])
+
+    actor = params.get('actor')
+    if actor:
+        qs = qs.filter(actor_id=int(actor)) if actor.isdigit() else qs.filter(actor__username=actor)
+
+    ip = params.get('ip')
+    if ip:
+        qs = qs.filter(ip_address=str(ipaddress.ip_address(ip)))
+
+    if params.get('since'):
+        qs = qs.filter(created_at__gte=_parse_time_bound(params['since']))
+    if params.get('until'):
+        qs = qs.filter(created_at__lt=_parse_time_bound(params['until']))
+
+    search = (params.get('search') or '').strip()
+    if search:
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchQuery, SearchVector
+            # Same expression as auditlog_search_idx (users/migrations/0018), so the GIN index is used
+            qs = qs.annotate(search_doc=SearchVector('target', 'details', config=AUDIT_SEARCH_CONFIG)).filter(
+                search_doc=SearchQuery(search, search_type='websearch', config=AUDIT_SEARCH_CONFIG)
+            )
+        else:
+            for term in search.split():
+                qs = qs.filter(Q(target__icontains=term) | Q(details__icontains=term))
+    return qs
+
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        qs = super().get_queryset().select_related('actor')
+        if self.action == 'list':
+            qs = filter_audit_logs(qs, self.request.query_params)
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="audit_logs.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Event Type', 'Actor', 'Target', 'IP Address', 'Details', 'Created At'])
-
-        for log in self.queryset.all():
-            writer.writerow([
-                log.event_type,
-                log.actor.username if log.actor else 'System/Proton',
-                log.target,
-                log.ip_address,
-                log.details,
-                log.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            ])
-        return response
+        logs = AuditLog.objects.select_related('actor').only(
+            'event_type', 'target', 'ip_address', 'details', 'created_at', 'actor__username'
+        ).order_by('-created_at', '-id')
+        try:
+            logs = filter_audit_logs(logs, request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = iter_rows(logs, lambda log: [
+            log.event_type,
+            log.actor.username if log.actor else 'System/Proton',
+            log.target,
+            log.ip_address,
+            log.details,
+            log.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        ])
+        headers = ['Event Type', 'Actor', 'Target', 'IP Address', 'Details', 'Created At']
+        return export_response(request, headers, rows, 'audit_logs')
+
+    @action(detail=False, methods=['get'])
+    def writer_stats(self, request):
+        """Counters of the buffered audit writer in this worker"""
+        return Response(audit_writer.stats())
 
     @action(detail=False, methods=['post'])
     def delete_old_logs(self, request):
@@ -66,7 +147,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             days = int(days)
             cutoff_date = timezone.now() - timedelta(days=days)
-            deleted_count, _ = AuditLog.objects.filter(created_at__lt=cutoff_date).delete()
+            # Chunked by PK range, see users.retention
+            deleted_count = purge_range(AuditLog.objects.filter(created_at__lt=cutoff_date))
             log_audit(request, "LOGS_CLEANED", f"Deleted {deleted_count} logs older than {days} days")
             return Response({"status": "success", "deleted_count": deleted_count})
         except ValueError:
@@ -76,6 +158,7 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [GlobalPermission]
+    cursor_ordering = ('-id',)
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -135,15 +218,9 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="users.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Username', 'Email', 'Full Name', 'Role', 'Team Position', 'SIG', 'Status'])
-
-        for user in self.queryset.all():
+        def row(user):
             profile = getattr(user, 'profile', None)
-            writer.writerow([
+            return [
                 user.username,
                 user.email,
                 profile.full_name if profile else '',
@@ -151,8 +228,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 profile.position if profile else '',
                 profile.sig if profile else '',
                 'Active' if user.is_active else 'Inactive'
-            ])
-        return response
+            ]
+
+        users = User.objects.select_related('profile').order_by('id')
+        headers = ['Username', 'Email', 'Full Name', 'Role', 'Team Position', 'SIG', 'Status']
+        return export_response(request, headers, iter_rows(users, row), 'users')
 
     def destroy(self, request, *args, **kwargs):
         user = self.get_object()
@@ -254,6 +334,9 @@ class UserViewSet(viewsets.ModelViewSet):
                  order = item.get('order')
                  if uid and order is not None:
                      MemberProfile.objects.filter(user_id=uid).update(order=order)
+        # .update() sends no signals
+        bump_model_version(MemberProfile)
+        invalidate_directory()
         return Response({"status": "updated"})
 
 
@@ -261,6 +344,7 @@ class RoleViewSet(viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Small lookup list
 
     def perform_create(self, serializer):
         r = serializer.save()
@@ -276,10 +360,12 @@ class RoleViewSet(viewsets.ModelViewSet):
 
 # CMS & Taxonomy
 
-class SigViewSet(viewsets.ModelViewSet):
+class SigViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('users.Sig',)
     queryset = Sig.objects.all()
     serializer_class = SigSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Small lookup list
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -287,6 +373,8 @@ class SigViewSet(viewsets.ModelViewSet):
         res = super().update(request, *args, **kwargs)
         if old != res.data['name']:
              MemberProfile.objects.filter(sig=old).update(sig=res.data['name'])
+             bump_model_version(MemberProfile)
+             invalidate_directory()
              log_audit(request, "SIG_RENAMED", f"Renamed SIG {old} to {res.data['name']}")
         return res
 
@@ -299,17 +387,22 @@ class SigViewSet(viewsets.ModelViewSet):
                  order = item.get('order')
                  if uid and order is not None:
                      Sig.objects.filter(id=uid).update(order=order)
+        bump_model_version(Sig)
+        invalidate_directory()
         return Response({"status": "updated"})
 
-class TeamPositionViewSet(viewsets.ModelViewSet):
+class TeamPositionViewSet(PublicResponseCacheMixin, viewsets.ModelViewSet):
+    cache_models = ('users.TeamPosition',)
     queryset = TeamPosition.objects.all()
     serializer_class = TeamPositionSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Small lookup list
 
 class ProfileFieldViewSet(viewsets.ModelViewSet):
     queryset = ProfileFieldDefinition.objects.all()
     serializer_class = ProfileFieldDefinitionSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = None # Small lookup list
     
     def perform_create(self, serializer):
         f = serializer.save()
@@ -403,13 +496,27 @@ class UserProfileView(APIView):
         log_audit(request, "PROFILE_SELF_UPDATE", f"User {user.username} updated own profile")
         return Response(UserSerializer(user).data)
 
-class PublicTeamView(generics.ListAPIView):
+class PublicTeamView(APIView):
+    """
+    Landing-page team list, ordered by profile rank. Served from the cached
+    directory (users.team_directory) as pre-encoded JSON with an ETag.
+    ?type=alumni for alumni, ?group_by=sig|position for grouped sections.
+    """
     permission_classes = [permissions.AllowAny]
-    serializer_class = UserSerializer
+    authentication_classes = [] # Same page for everyone
 
-    def get_queryset(self):
-        qs = User.objects.filter(is_active=True, profile__is_public=True).select_related('profile').prefetch_related('user_roles')
-        m_type = self.request.query_params.get('type')
-        if m_type == 'alumni': qs = qs.filter(profile__is_alumni=True)
-        else: qs = qs.filter(profile__is_alumni=False)
-        return qs.order_by('profile__order', 'profile__full_name')
+    def get(self, request):
+        m_type = 'alumni' if request.query_params.get('type') == 'alumni' else 'current'
+        group_by = request.query_params.get('group_by') or None
+        if group_by is not None and group_by not in GROUPINGS:
+            return Response({"error": f"group_by must be one of: {', '.join(GROUPINGS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        body, etag = get_directory(m_type, group_by, request.build_absolute_uri('/')[:-1])
+
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
@@ -0,0 +1,24 @@
+import api from "./axios";
+
+// List endpoints are cursor-paginated: { next, previous, results }.
+// Small lookup lists (roles, sigs, positions, ...) still return plain arrays.
+
+const PAGE_SIZE = 200; // Server maximum
+
+// `next` / `previous` links are absolute; keep requests on the axios baseURL (/api)
+export const toApiPath = (link) => link.replace(/^.*?\/api(?=\/)/, "");
+
+// Fetch every page of a list endpoint and return the rows as one array
+export async function fetchAll(url, params = {}) {
+  const res = await api.get(url, { params: { page_size: PAGE_SIZE, ...params } });
+  if (Array.isArray(res.data)) return res.data;
+
+  const rows = [...res.data.results];
+  let next = res.data.next;
+  while (next) {
+    const page = await api.get(toApiPath(next));
+    rows.push(...page.data.results);
+    next = page.data.next;
+  }
+  return rows;
+}
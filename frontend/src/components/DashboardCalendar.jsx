@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { ChevronLeft, ChevronRight, Plus, AlertCircle, Clock } from "lucide-react";
 import { useNavigate } from "react-router-dom";
-import api from "../api/axios";
+import { fetchAll } from "../api/pagination";
 
 export default function DashboardCalendar() {
     const navigate = useNavigate();
@@ -11,11 +11,8 @@ export default function DashboardCalendar() {
     useEffect(() => {
         // Fetch all events for now (assuming reasonable dataset size)
         // Ideally we filter by month range in the backend
-        api.get("/events/")
-            .then(res => {
-                const list = res.data.results || res.data || [];
-                setEvents(list);
-            })
+        fetchAll("/events/")
+            .then(list => setEvents(list))
             .catch(err => console.error("Failed to load calendar events", err));
     }, []);
 
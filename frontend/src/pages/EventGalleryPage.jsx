@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import api from "../api/axios";
+import { fetchAll } from "../api/pagination";
 import Navbar from "../components/Navbar";
 import Footer from "../components/Footer";
 
@@ -17,11 +18,11 @@ export default function EventGalleryPage() {
 
     const fetchData = async () => {
         try {
-            const [imgRes, eventRes] = await Promise.all([
-                api.get(`/gallery/?event=${id}`),
+            const [imageList, eventRes] = await Promise.all([
+                fetchAll("/gallery/", { event: id }),
                 api.get(`/events/${id}/`)
             ]);
-            setImages(imgRes.data);
+            setImages(imageList);
             setEvent(eventRes.data);
         } catch (err) {
             console.error(err);
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../api/axios";
+import { fetchAll } from "../api/pagination";
 import { buildMediaUrl } from "../utils/mediaUrl";
 import { formatDateIST } from "../utils/dateUtils";
 import Navbar from "../components/Navbar";
@@ -16,8 +16,7 @@ export default function Events() {
 
   async function fetchEvents() {
     try {
-      const res = await api.get("/events/");
-      setEvents(res.data.results || res.data);
+      setEvents(await fetchAll("/events/"));
     } catch (err) {
       console.error(err);
     } finally {
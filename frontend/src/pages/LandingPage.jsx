@@ -7,6 +7,7 @@ import ProjectModal from "../components/ProjectModal";
 import GalleryMarquee from "../components/GalleryMarquee";
 import GalleryModal from "../components/GalleryModal";
 import api from "../api/axios";
+import { fetchAll } from "../api/pagination";
 
 export default function LandingPage() {
   const [projects, setProjects] = useState([]);
@@ -22,16 +23,16 @@ export default function LandingPage() {
     let isMounted = true;
     const loadData = async () => {
       try {
-        const [projRes, galRes, recRes] = await Promise.all([
-          api.get("/projects/"),
-          api.get("/gallery/"),
+        const [projectList, galleryList, recRes] = await Promise.all([
+          fetchAll("/projects/"),
+          fetchAll("/gallery/"),
           api.get("/recruitment/drives/active_public/").catch(() => ({ data: null }))
         ]);
 
         if (isMounted) {
           // Filter only public projects
-          setProjects(projRes.data.filter(p => p.is_public));
-          setGallery(galRes.data);
+          setProjects(projectList.filter(p => p.is_public));
+          setGallery(galleryList);
           if (recRes.data) {
             setRecruitment(recRes.data);
           }
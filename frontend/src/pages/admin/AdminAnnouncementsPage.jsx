@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import AnnouncementFormModal from "../../components/AnnouncementFormModal";
 import AnnouncementStatusBadge from "../../components/AnnouncementStatusBadge";
 
@@ -27,8 +28,7 @@ export default function AdminAnnouncementsPage() {
   async function fetchAnnouncements() {
     try {
       setLoading(true);
-      const res = await api.get("/announcements/");
-      setAnnouncements(res.data.results || res.data);
+      setAnnouncements(await fetchAll("/announcements/"));
     } finally {
       setLoading(false);
     }
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 export default function AdminAttendancePage() {
     const [sessions, setSessions] = useState([]);
@@ -24,11 +25,11 @@ export default function AdminAttendancePage() {
     const loadData = async () => {
         setLoading(true);
         try {
-            const [sRes, sigRes] = await Promise.all([
-                api.get("/attendance/sessions/"),
+            const [sessionList, sigRes] = await Promise.all([
+                fetchAll("/attendance/sessions/"),
                 api.get("/sigs/")
             ]);
-            setSessions(sRes.data);
+            setSessions(sessionList);
             setSigOptions(sigRes.data);
         } catch (err) {
             console.error("Failed to load attendance", err);
@@ -1,13 +1,16 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { toApiPath } from "../../api/pagination";
 
 export default function AdminAuditLogs() {
   const navigate = useNavigate();
 
   const [logs, setLogs] = useState([]);
+  // Cursor pagination: the server hands out next/previous links, not page numbers
+  const [pageLink, setPageLink] = useState(null);
+  const [links, setLinks] = useState({ next: null, previous: null });
   const [page, setPage] = useState(1);
-  const [total, setTotal] = useState(0);
   const [eventType, setEventType] = useState("");
   const [deleteDays, setDeleteDays] = useState(""); // For delete input
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
@@ -39,7 +42,7 @@ export default function AdminAuditLogs() {
       alert(`Deleted ${res.data.deleted_count} logs.`);
       setShowDeleteConfirm(false);
       setDeleteDays("");
-      fetchLogs();
+      goToFirstPage();
     } catch (err) {
       console.error("Delete failed", err);
       alert("Failed to delete logs.");
@@ -48,43 +51,36 @@ export default function AdminAuditLogs() {
 
   useEffect(() => {
     fetchLogs();
-  }, [page, eventType]);
+  }, [pageLink, eventType]);
 
   const fetchLogs = async () => {
     try {
-      const res = await api.get("/audit-logs/", {
-        params: { page, limit, eventType },
-      });
-
-      // Handle different response structures
-      if (Array.isArray(res.data)) {
-        // No pagination active on backend
-        let filtered = res.data;
-        if (eventType) {
-          filtered = filtered.filter(l => l.event_type === eventType);
-        }
-        // Manual client-side pagination since backend isn't paginating
-        setTotal(filtered.length);
-        const start = (page - 1) * limit;
-        setLogs(filtered.slice(start, start + limit));
-      } else if (res.data.results) {
-        // Standard DRF Pagination
-        setLogs(res.data.results);
-        setTotal(res.data.count);
-      } else if (res.data.data) {
-        // Custom envelope (as implied by previous code)
-        setLogs(res.data.data);
-        setTotal(res.data.total);
-      } else {
-        setLogs([]);
-        setTotal(0);
-      }
+      // next/previous links already carry page_size and the filters
+      const res = pageLink
+        ? await api.get(toApiPath(pageLink))
+        : await api.get("/audit-logs/", {
+            params: { page_size: limit, ...(eventType && { event_type: eventType }) },
+          });
+      setLogs(res.data.results);
+      setLinks({ next: res.data.next, previous: res.data.previous });
     } catch (err) {
       console.error("Failed to load logs", err);
     }
   };
 
-  const totalPages = Math.ceil(total / limit);
+  const goToFirstPage = () => {
+    setPage(1);
+    if (pageLink) {
+      setPageLink(null);
+    } else {
+      fetchLogs();
+    }
+  };
+
+  const goTo = (link, step) => {
+    setPage(page + step);
+    setPageLink(link);
+  };
 
   const badgeStyle = (success) =>
     success
@@ -156,6 +152,7 @@ export default function AdminAuditLogs() {
           onChange={(e) => {
             setEventType(e.target.value);
             setPage(1);
+            setPageLink(null);
           }}
           className="
             mt-4 md:mt-0
@@ -293,21 +290,20 @@ export default function AdminAuditLogs() {
       {/* ===== PAGINATION ===== */}
       <div className="flex items-center justify-between mt-6">
         <button
-          disabled={page === 1}
-          onClick={() => setPage(page - 1)}
+          disabled={!links.previous}
+          onClick={() => goTo(links.previous, -1)}
           className="px-4 py-2 rounded-lg bg-gray-800 text-gray-300 disabled:opacity-40 hover:bg-gray-700 transition"
         >
           ← Prev
         </button>
 
         <span className="text-gray-400 text-sm">
-          Page <span className="text-gray-200">{page}</span> of{" "}
-          <span className="text-gray-200">{totalPages || 1}</span>
+          Page <span className="text-gray-200">{page}</span>
         </span>
 
         <button
-          disabled={page === totalPages || totalPages === 0}
-          onClick={() => setPage(page + 1)}
+          disabled={!links.next}
+          onClick={() => goTo(links.next, 1)}
           className="px-4 py-2 rounded-lg bg-gray-800 text-gray-300 disabled:opacity-40 hover:bg-gray-700 transition"
         >
           Next →
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 export default function AdminContactMessages() {
   const navigate = useNavigate();
@@ -28,15 +29,12 @@ export default function AdminContactMessages() {
   const fetchMessages = async () => {
     setLoading(true);
     try {
-      const res = await api.get("/contact-messages/", {
-        params: {
-          ...Object.fromEntries(
-            Object.entries(filters).filter(([_, v]) => v !== "")
-          ),
-        },
-      });
-      setMessages(res.data || []);
-      setTotal(res.data?.length || 0);
+      const list = await fetchAll(
+        "/contact-messages/",
+        Object.fromEntries(Object.entries(filters).filter(([_, v]) => v !== ""))
+      );
+      setMessages(list);
+      setTotal(list.length);
     } finally {
       setLoading(false);
     }
@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import { useNavigate } from "react-router-dom";
 import { formatDateIST } from "../../utils/dateUtils";
 
@@ -36,15 +37,9 @@ export default function AdminEvents() {
 
   async function fetchEvents() {
     try {
-      const res = await api.get("/events/", {
-        params: { page, limit }
-      });
-      // Handle DRF Standard Pagination or plain list
-      const list = res.data.results || res.data;
-      const count = res.data.count || list.length;
-
+      const list = await fetchAll("/events/");
       setEvents(list);
-      setTotal(count);
+      setTotal(list.length);
     } catch (err) {
       console.error(err);
       showToast("Failed to load events.", "error");
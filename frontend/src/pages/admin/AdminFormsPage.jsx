@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import { formatDateIST, formatDateOnlyIST } from "../../utils/dateUtils";
 
 export default function AdminFormsPage() {
@@ -17,8 +18,7 @@ export default function AdminFormsPage() {
     const fetchForms = async () => {
         try {
             setLoading(true);
-            const res = await api.get("/forms/");
-            setForms(res.data);
+            setForms(await fetchAll("/forms/"));
         } catch (err) {
             console.error(err);
         } finally {
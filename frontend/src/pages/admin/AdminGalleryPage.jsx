@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import { buildMediaUrl } from "../../utils/mediaUrl";
 
 export default function AdminGalleryPage() {
@@ -34,8 +35,7 @@ export default function AdminGalleryPage() {
 
   const loadImages = async () => {
     try {
-      const res = await api.get("/gallery/");
-      setImages(res.data.results || res.data);
+      setImages(await fetchAll("/gallery/"));
     } catch (err) {
       console.error("Failed to load gallery", err);
     }
@@ -44,9 +44,7 @@ export default function AdminGalleryPage() {
   const loadEvents = async () => {
     try {
       // Fetch simple list of events for dropdown
-      const res = await api.get("/events/?limit=100");
-      const list = res.data.results || res.data || [];
-      setEvents(list);
+      setEvents(await fetchAll("/events/"));
     } catch (err) {
       console.error("Failed to load events", err);
     }
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate, useOutletContext } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 // SVG ICONS
 const TaskIcon = () => <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2m-3 7h3m-3 4h3m-6-4h.01M9 16h.01" /></svg>;
@@ -23,12 +24,12 @@ export default function AdminProjectsPage() {
   const loadData = async () => {
     setLoading(true);
     try {
-      const [pRes, uRes] = await Promise.all([
-        api.get("/projects/"),
-        api.get("/management/")
+      const [projectList, userList] = await Promise.all([
+        fetchAll("/projects/"),
+        fetchAll("/management/")
       ]);
-      setProjects(pRes.data);
-      setUsers(uRes.data);
+      setProjects(projectList);
+      setUsers(userList);
     } catch (err) {
       console.error(err);
     } finally {
@@ -441,7 +442,7 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
                 {project.members_details?.map(m => (
                   <div key={m.id} className="bg-white/5 p-3 rounded flex items-center gap-3">
                     <div className="w-8 h-8 rounded-full bg-cyan-900 flex items-center justify-center text-xs">{m.username[0]}</div>
-                    <div><div className="text-sm font-bold text-white">{m.profile?.full_name || m.username}</div><div className="text-xs text-gray-500">{m.profile?.position || "Member"}</div></div>
+                    <div><div className="text-sm font-bold text-white">{m.full_name || m.username}</div><div className="text-xs text-gray-500">{m.position || "Member"}</div></div>
                     <button onClick={async () => { const newMembers = project.members.filter(id => id !== m.id); await api.patch(`/projects/${project.id}/`, { members: newMembers }); onUpdate(); }} className="ml-auto text-red-500 hover:text-red-300">&times;</button>
                   </div>
                 ))}
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 export default function AdminQuizPage() {
     const [quizzes, setQuizzes] = useState([]);
@@ -13,8 +14,7 @@ export default function AdminQuizPage() {
 
     const fetchQuizzes = async () => {
         try {
-            const res = await api.get("/quizzes/");
-            setQuizzes(res.data);
+            setQuizzes(await fetchAll("/quizzes/"));
         } catch (err) {
             console.error(err);
         } finally {
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 export default function AdminQuizResponses() {
     const { id } = useParams();
@@ -16,12 +17,12 @@ export default function AdminQuizResponses() {
 
     const fetchData = async () => {
         try {
-            const [qRes, aRes] = await Promise.all([
+            const [qRes, attemptList] = await Promise.all([
                 api.get(`/quizzes/${id}/`),
-                api.get(`/attempts/`)
+                fetchAll("/attempts/", { quiz: id, expand: "user_details" })
             ]);
             setQuiz(qRes.data);
-            setAttempts(aRes.data.filter(a => a.quiz === parseInt(id)));
+            setAttempts(attemptList);
         } catch (err) { navigate("/admin/quizzes"); }
         finally { setLoading(false); }
     };
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { Copy, Plus, Trash, ExternalLink, FileText, Upload, Users, GraduationCap, Award, MessageSquare, Calendar, Download, ChevronRight } from "lucide-react";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import { formatDateIST } from "../../utils/dateUtils";
 
 export default function AdminRecruitmentPage() {
@@ -37,10 +38,10 @@ export default function AdminRecruitmentPage() {
     const loadDrives = async () => {
         try {
             setLoading(true);
-            const res = await api.get("/recruitment/drives/");
-            setDrives(res.data);
-            if (res.data.length > 0) {
-                const active = selectedDrive ? res.data.find(d => d.id === selectedDrive.id) : (res.data.find(d => d.is_active) || res.data[0]);
+            const list = await fetchAll("/recruitment/drives/");
+            setDrives(list);
+            if (list.length > 0) {
+                const active = selectedDrive ? list.find(d => d.id === selectedDrive.id) : (list.find(d => d.is_active) || list[0]);
                 if (active) {
                     setSelectedDrive(active);
                     loadApplications(active.id);
@@ -56,8 +57,7 @@ export default function AdminRecruitmentPage() {
     const loadApplications = async (driveId) => {
         if (!driveId) return;
         try {
-            const res = await api.get(`/recruitment/applications/?drive_id=${driveId}`);
-            setApplications(res.data);
+            setApplications(await fetchAll("/recruitment/applications/", { drive_id: driveId }));
         } catch (err) { console.error(err); }
     };
 
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 /* ================= CONFIG ================= */
 
@@ -28,8 +29,7 @@ export default function AdminSponsorshipPage() {
 
   async function loadInquiries() {
     try {
-      const res = await api.get("/sponsorship/");
-      setItems(res.data);
+      setItems(await fetchAll("/sponsorship/"));
     } catch {
       showToast("Failed to load sponsorship inquiries", "error");
     } finally {
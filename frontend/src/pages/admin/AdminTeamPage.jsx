@@ -1,6 +1,7 @@
 import { useEffect, useState, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 // SVG ICONS
 const GripIcon = () => (
@@ -29,11 +30,10 @@ export default function AdminTeamPage() {
       // Assuming this endpoint lists all users/profiles.
       // But we actually need to filter properly. We used /users/list/ or /management/ in other screens.
       // Let's use /management/ as it returns detailed profile info.
-      const res = await api.get("/management/");
+      const raw = await fetchAll("/management/");
 
       // Filter to only those with profiles (or at least filter out superusers if needed, but maybe not)
       // Group by SIG and Alumni status
-      const raw = res.data;
       setAllMembers(raw);
       groupData(raw);
 
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 
 export default function AdminUsersPage() {
     const navigate = useNavigate();
@@ -41,14 +42,14 @@ export default function AdminUsersPage() {
     const loadData = async () => {
         try {
             setLoading(true);
-            const [usersRes, rolesRes, sigsRes, fieldsRes, posRes] = await Promise.all([
-                api.get("/management/"),
+            const [userList, rolesRes, sigsRes, fieldsRes, posRes] = await Promise.all([
+                fetchAll("/management/"),
                 api.get("/roles/"),
                 api.get("/sigs/"),
                 api.get("/profile-fields/"),
                 api.get("/positions/")
             ]);
-            setUsers(usersRes.data);
+            setUsers(userList);
             setRoles(rolesRes.data);
             setSigs(sigsRes.data);
             setFields(fieldsRes.data);
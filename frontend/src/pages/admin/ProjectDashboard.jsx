@@ -1,6 +1,7 @@
 import { useEffect, useState, useRef } from "react";
 import { useParams, useNavigate, useOutletContext, useSearchParams } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchAll } from "../../api/pagination";
 import { buildMediaUrl } from "../../utils/mediaUrl";
 
 // Icons
@@ -15,6 +16,46 @@ const isUserOnline = (lastLogin) => {
     return diff < 60;
 };
 
+// Highest message id in a freshly loaded project: where the delta cursor starts
+const latestMessageId = (project) =>
+    Math.max(0, ...(project.threads || []).flatMap(t => (t.messages || []).map(m => m.id)));
+
+// Merge a /projects/<id>/delta/ payload (new/changed rows, logins, removed ids) into the loaded project
+const applyDelta = (prev, delta) => {
+    if (!prev) return prev;
+    const removed = delta.removed || {};
+    const goneMessages = new Set(removed.messages || []);
+    const goneTasks = new Set(removed.tasks || []);
+    const goneMembers = new Set(removed.members || []);
+
+    const byThread = {};
+    delta.messages.forEach(m => { (byThread[m.thread] = byThread[m.thread] || []).push(m); });
+    const threads = prev.threads?.map(t => {
+        const messages = t.messages || [];
+        const known = new Set(messages.map(m => m.id));
+        const added = (byThread[t.id] || []).filter(m => !known.has(m.id));
+        const kept = messages.filter(m => !goneMessages.has(m.id));
+        if (!added.length && kept.length === messages.length) return t;
+        return { ...t, messages: [...kept, ...added] };
+    });
+
+    const changedTasks = Object.fromEntries(delta.tasks.map(task => [task.id, task]));
+    const tasks = (prev.tasks || []).filter(task => !goneTasks.has(task.id)).map(task => changedTasks[task.id] || task);
+    const knownTasks = new Set(tasks.map(task => task.id));
+    delta.tasks.forEach(task => { if (!knownTasks.has(task.id) && !goneTasks.has(task.id)) tasks.push(task); });
+
+    const logins = delta.members_status || {};
+    const withLogin = (u) => (u && logins[u.id] ? { ...u, last_login: logins[u.id] } : u);
+    return {
+        ...prev,
+        threads,
+        tasks,
+        members: prev.members?.filter(mid => !goneMembers.has(mid)),
+        members_details: prev.members_details?.filter(m => !goneMembers.has(m.id)).map(withLogin),
+        lead_details: withLogin(prev.lead_details),
+    };
+};
+
 export default function ProjectDashboard() {
     const { id } = useParams();
     const navigate = useNavigate();
@@ -28,7 +69,7 @@ export default function ProjectDashboard() {
 
     useEffect(() => {
         if (user) {
-            api.get("/management/").then(res => setAllUsers(res.data)).catch(err => console.error(err));
+            fetchAll("/management/").then(setAllUsers).catch(err => console.error(err));
         }
     }, [user]);
 
@@ -41,47 +82,42 @@ export default function ProjectDashboard() {
         loadProject();
     }, [id]);
 
+    // Desktop notification + unread badge for messages by others outside the open thread
+    const announceMessages = (messages, threads) => {
+        const newUnread = new Set(unreadMsgIds);
+        let updateUnread = false;
+        const currentThreadId = parseInt(searchParams.get("thread"));
+
+        messages.forEach(m => {
+            if (m.author === user.id) return;
+            const thread = threads.find(t => t.id === m.thread);
+            if (Notification.permission === "granted") {
+                new Notification(`New Signal: #${thread?.title}`, {
+                    body: `${m.author_details?.username}: ${m.content.substring(0, 50)}${m.content.length > 50 ? '...' : ''}`,
+                    icon: '/favicon.ico'
+                });
+            }
+
+            // Clean logic: If not currently looking at this thread, mark likely unread
+            if (activeTab !== 'discussions' || currentThreadId !== m.thread) {
+                newUnread.add(m.id);
+                updateUnread = true;
+            }
+        });
+        if (updateUnread) setUnreadMsgIds(newUnread);
+    };
+
     const loadProject = async (isSilent = false) => {
         try {
             if (!isSilent) setLoading(true);
             const res = await api.get(`/projects/${id}/`);
             const data = res.data;
 
-            // Notification Logic
             // Notification Logic
             if (isSilent && data.threads) {
-                const newSeen = new Set(seenMessageIds);
-                const newUnread = new Set(unreadMsgIds);
-                let updateUnread = false;
-
-                const currentThreadId = parseInt(searchParams.get("thread"));
-
-                data.threads.forEach(thread => {
-                    thread.messages?.forEach(m => {
-                        if (!newSeen.has(m.id)) {
-                            // It's a new message!
-                            if (m.author !== user.id) {
-                                if (Notification.permission === "granted") {
-                                    new Notification(`New Signal: #${thread.title}`, {
-                                        body: `${m.author_details?.username}: ${m.content.substring(0, 50)}${m.content.length > 50 ? '...' : ''}`,
-                                        icon: '/favicon.ico'
-                                    });
-                                }
-
-                                // Clean logic: If not currently looking at this thread, mark likely unread
-                                if (activeTab !== 'discussions' || currentThreadId !== thread.id) {
-                                    newUnread.add(m.id);
-                                    updateUnread = true;
-                                }
-                            }
-                            newSeen.add(m.id);
-                        }
-                    });
-                });
-
-                setSeenMessageIds(newSeen);
-                if (updateUnread) setUnreadMsgIds(newUnread);
-
+                const fresh = data.threads.flatMap(t => (t.messages || []).filter(m => !seenMessageIds.has(m.id)));
+                announceMessages(fresh, data.threads);
+                setSeenMessageIds(new Set([...seenMessageIds, ...fresh.map(m => m.id)]));
             } else if (!isSilent && data.threads) {
                 // Initialize seen IDs on first load
                 const initialIds = new Set();
@@ -89,6 +125,8 @@ export default function ProjectDashboard() {
                 setSeenMessageIds(initialIds);
             }
 
+            // Later changes arrive through delta, starting from what this load returned
+            deltaRef.current = data.threads ? { cursor: { message: latestMessageId(data), time: null }, etag: null } : {};
             setProject(data);
         } catch (err) {
             console.error(err);
@@ -98,63 +136,136 @@ export default function ProjectDashboard() {
         }
     };
 
-    // Adaptive Polling Logic (Traffic Control)
+    // Incremental sync: only messages, task changes, logins and removals after the cursor.
+    // Returns true when the server has more to send right away.
+    const deltaRef = useRef({});
+    const projectRef = useRef(project);
+    projectRef.current = project;
+
+    const syncDelta = async () => {
+        const { cursor, etag } = deltaRef.current;
+        if (!cursor) return false;
+        const params = { since_message: cursor.message };
+        if (cursor.time) params.since = cursor.time;
+
+        let res;
+        try {
+            res = await api.get(`/projects/${id}/delta/`, { params, headers: etag ? { "If-None-Match": etag } : {} });
+        } catch (err) {
+            if (err.response?.status === 304) return false; // Nothing new
+            throw err;
+        }
+        const delta = res.data;
+        const threads = projectRef.current?.threads || [];
+        // A stale cursor, or a message in a thread created elsewhere: only a full load has it all
+        if (delta.resync || delta.messages.some(m => !threads.some(t => t.id === m.thread))) {
+            await loadProject(true);
+            return false;
+        }
+
+        deltaRef.current = { cursor: delta.cursor, etag: res.headers.etag || null };
+        const fresh = delta.messages.filter(m => !seenMessageIds.has(m.id));
+        if (fresh.length) {
+            announceMessages(fresh, threads);
+            setSeenMessageIds(prev => new Set([...prev, ...fresh.map(m => m.id)]));
+        }
+        setProject(prev => applyDelta(prev, delta));
+        return delta.has_more;
+    };
+    const syncDeltaRef = useRef(syncDelta);
+    syncDeltaRef.current = syncDelta;
+
+    // Server Push (ASGI deployments): the stream says when to sync, the delta endpoint says what changed.
+    // Under WSGI the ticket request answers 501 and polling below does all the work.
+    const [streamLive, setStreamLive] = useState(false);
+    const [streamTypers, setStreamTypers] = useState({}); // thread id -> [{ id, username, until }]
+
+    useEffect(() => {
+        if (!user || typeof EventSource === "undefined") return;
+
+        let source;
+        let syncTimer;
+        let retryTimer;
+        let retries = 0;
+        let cancelled = false;
+
+        const scheduleSync = () => {
+            clearTimeout(syncTimer);
+            syncTimer = setTimeout(() => syncDeltaRef.current().catch(() => {}), 250); // Coalesce bursts
+        };
+        const scheduleConnect = () => {
+            if (cancelled) return;
+            retryTimer = setTimeout(connect, Math.min(60000, 3000 * 2 ** retries++));
+        };
+
+        const connect = async () => {
+            // EventSource cannot send headers; a single-use ticket keeps the JWT out of the URL
+            let ticket;
+            try {
+                ticket = (await api.post(`/projects/${id}/stream_ticket/`)).data.ticket;
+            } catch (err) {
+                const code = err.response?.status;
+                if (code === 501 || code === 401 || code === 403) return; // No stream here, or not ours to open
+                scheduleConnect();
+                return;
+            }
+            if (cancelled) return;
+
+            source = new EventSource(`/api/projects/${id}/events/?ticket=${encodeURIComponent(ticket)}`);
+            source.addEventListener("open", () => {
+                retries = 0;
+                setStreamLive(true);
+                scheduleSync(); // Whatever happened while we were disconnected
+            });
+            source.addEventListener("message", scheduleSync);
+            source.addEventListener("task", scheduleSync);
+            source.addEventListener("typing", (e) => {
+                const { thread, user: typer } = JSON.parse(e.data);
+                if (typer.id === user.id) return;
+                setStreamTypers(prev => ({
+                    ...prev,
+                    [thread]: [...(prev[thread] || []).filter(t => t.id !== typer.id), { ...typer, until: Date.now() + 4000 }]
+                }));
+            });
+            // The ticket is spent, so EventSource's own reconnect would be refused: reconnect with a new one.
+            // Polling speeds back up in the meantime.
+            source.onerror = () => {
+                source.close();
+                setStreamLive(false);
+                scheduleConnect();
+            };
+        };
+        connect();
+
+        return () => {
+            cancelled = true;
+            clearTimeout(syncTimer);
+            clearTimeout(retryTimer);
+            if (source) source.close();
+            setStreamLive(false);
+        };
+    }, [id, user]);
+
+    // Adaptive Polling Logic (Traffic Control). Slowed right down while the event stream is live,
+    // but kept as a fallback for events the stream missed (e.g. published during a reconnect).
     useEffect(() => {
         // Spin Down: If no user session, do not start engine
         if (!user) return;
 
         let timeoutId;
-        let isMount = true;
+        const pace = streamLive ? 30000 : 5000;
 
         const poll = async () => {
             // Stop polling if not active or tab hidden (Browser API)
-            if (document.hidden || !project) {
-                timeoutId = setTimeout(poll, 10000); // Slow down significantly when hidden
+            if (document.hidden) {
+                timeoutId = setTimeout(poll, Math.max(pace, 10000)); // Slow down significantly when hidden
                 return;
             }
 
             try {
-                // Lightweight Sync Call
-                const res = await api.get(`/projects/${id}/sync_state/`);
-                const { members_status = {}, threads_state = {} } = res.data || {};
-
-                // State Update Logic
-                // 3. Diffing & Side-Effects (Moved OUT of setProject)
-                let needsThreadReload = false;
-                if (activeTab === 'discussions' && project.threads) {
-                    for (const t of project.threads) {
-                        const serverLastMsgId = threads_state[t.id] || 0;
-                        const localLastMsgId = t.messages?.length > 0 ? t.messages[t.messages.length - 1].id : 0;
-                        if (serverLastMsgId !== localLastMsgId) {
-                            needsThreadReload = true;
-                            break;
-                        }
-                    }
-                }
-
-                if (needsThreadReload) {
-                    await loadProject(true);
-                } else {
-                    // Only update members if no thread reload happened
-                    setProject(prev => {
-                        if (!prev) return null;
-                        const membersChanged = prev.members_details?.some(m => members_status[m.id] && members_status[m.id] !== m.last_login);
-                        const leadChanged = prev.lead_details && members_status[prev.lead_details.id] !== prev.lead_details.last_login;
-
-                        if (membersChanged || leadChanged) {
-                            return {
-                                ...prev,
-                                members_details: prev.members_details?.map(m => ({ ...m, last_login: members_status[m.id] || m.last_login })),
-                                lead_details: prev.lead_details ? { ...prev.lead_details, last_login: members_status[prev.lead_details.id] || prev.lead_details.last_login } : prev.lead_details
-                            };
-                        }
-                        return prev;
-                    });
-                }
-
-                // Normal Pace: 5 seconds
-                timeoutId = setTimeout(poll, 5000);
-
+                const hasMore = await syncDeltaRef.current();
+                // Normal Pace: 5 seconds, 30 with the stream up (straight away while a backlog is being paged in)
+                timeoutId = setTimeout(poll, hasMore ? 0 : pace);
             } catch (err) {
                 // Kill Switch: If Auth fails (401/403), stop polling completely
                 if (err.response && (err.response.status === 401 || err.response.status === 403)) {
@@ -169,13 +280,10 @@ export default function ProjectDashboard() {
         };
 
         // Start the loop
-        timeoutId = setTimeout(poll, 5000);
+        timeoutId = setTimeout(poll, pace);
 
-        return () => {
-            isMount = false;
-            clearTimeout(timeoutId);
-        };
-    }, [id, activeTab, project, user]);
+        return () => clearTimeout(timeoutId);
+    }, [id, user, streamLive]);
 
     // Clear unread when viewing thread
     useEffect(() => {
@@ -253,7 +361,7 @@ export default function ProjectDashboard() {
                             <p className="text-[10px] text-gray-500 uppercase font-bold mb-1">Project Lead</p>
                             <div className="flex items-center gap-2">
                                 <div className="w-6 h-6 rounded-full bg-cyan-900 flex items-center justify-center text-[10px] font-bold">{project.lead_details?.username?.[0]}</div>
-                                <span className="text-sm font-medium text-gray-200">{project.lead_details?.profile?.full_name || project.lead_details?.username || "Unassigned"}</span>
+                                <span className="text-sm font-medium text-gray-200">{project.lead_details?.full_name || project.lead_details?.username || "Unassigned"}</span>
                             </div>
                         </div>
                     </div>
@@ -282,7 +390,7 @@ export default function ProjectDashboard() {
             <div className="min-h-[500px]">
                 {activeTab === 'overview' && <OverviewTab project={project} />}
                 {activeTab === 'tasks' && <TasksTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} />}
-                {activeTab === 'discussions' && <DiscussionsTab project={project} setProject={setProject} user={user} onUpdate={loadProject} unreadMsgIds={unreadMsgIds} setUnreadMsgIds={setUnreadMsgIds} />}
+                {activeTab === 'discussions' && <DiscussionsTab project={project} setProject={setProject} user={user} onUpdate={loadProject} unreadMsgIds={unreadMsgIds} setUnreadMsgIds={setUnreadMsgIds} streamLive={streamLive} streamTypers={streamTypers} />}
                 {activeTab === 'team' && <TeamTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} />}
                 {activeTab === 'manage' && <ManagementTab project={project} allUsers={allUsers} onUpdate={loadProject} />}
             </div>
@@ -434,7 +542,7 @@ function TasksTab({ project, user, allUsers, onUpdate }) {
     );
 }
 
-function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, setUnreadMsgIds }) {
+function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, setUnreadMsgIds, streamLive, streamTypers }) {
     const [msg, setMsg] = useState("");
     const [searchParams, setSearchParams] = useSearchParams();
     const activeThreadId = parseInt(searchParams.get("thread"));
@@ -474,7 +582,7 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
             id: Date.now(), // Temporary ID
             content: msg,
             author: user.id,
-            author_details: { username: user.username, profile: user.profile },
+            author_details: { id: user.id, username: user.username, full_name: user.profile?.full_name, position: user.profile?.position },
             created_at: new Date().toISOString()
         };
 
@@ -494,10 +602,25 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
             setMsg("");
 
             // 2. Transmit to server
-            await api.post("/messages/", { content: optimisticMsg.content, thread: activeThreadId });
+            const res = await api.post("/messages/", { content: optimisticMsg.content, thread: activeThreadId });
 
-            // 3. Silent sync to get real IDs/timestamps from server
-            onUpdate(true);
+            // 3. Swap in the stored row (real ID/timestamp); a sync may already have delivered it
+            setProject(prev => {
+                if (!prev) return prev;
+                return {
+                    ...prev,
+                    threads: prev.threads.map(t => {
+                        if (t.id !== activeThreadId) return t;
+                        const synced = t.messages.some(m => m.id === res.data.id);
+                        return {
+                            ...t,
+                            messages: synced
+                                ? t.messages.filter(m => m.id !== optimisticMsg.id)
+                                : t.messages.map(m => (m.id === optimisticMsg.id ? res.data : m))
+                        };
+                    })
+                };
+            });
         } catch (err) {
             console.error(err);
             alert("Transmission failed. Re-syncing...");
@@ -581,9 +704,18 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         }
     };
 
-    // Typing Status Poller (Lightweight)
+    // Pushed typing signals expire after a few seconds
     useEffect(() => {
-        if (!activeThreadId || document.hidden) return;
+        if (!activeThreadId || !streamLive) return;
+        const refresh = () => setTypers((streamTypers[activeThreadId] || []).filter(t => t.until > Date.now()));
+        refresh();
+        const interval = setInterval(refresh, 1000);
+        return () => clearInterval(interval);
+    }, [activeThreadId, streamLive, streamTypers]);
+
+    // Typing Status Poller (Lightweight), only while the event stream is down
+    useEffect(() => {
+        if (!activeThreadId || document.hidden || streamLive) return;
 
         const pollTypers = async () => {
             try {
@@ -596,7 +728,7 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         pollTypers(); // Initial
 
         return () => clearInterval(interval);
-    }, [activeThreadId]);
+    }, [activeThreadId, streamLive]);
 
     return (
         <div className="grid grid-cols-1 md:grid-cols-4 gap-6 h-[600px]">
@@ -786,9 +918,9 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                             <div className={`absolute bottom-0 right-0 w-3 h-3 rounded-full border-2 border-[#111] ${isUserOnline(project.lead_details?.last_login) ? 'bg-green-500' : 'bg-gray-500'}`} />
                         </div>
                         <div>
-                            <h4 className="font-bold text-cyan-400">LEAD: {project.lead_details?.profile?.full_name || project.lead_details?.username}</h4>
+                            <h4 className="font-bold text-cyan-400">LEAD: {project.lead_details?.full_name || project.lead_details?.username}</h4>
                             <p className="text-[10px] text-gray-400 font-bold uppercase flex items-center gap-1">
-                                {project.lead_details?.profile?.position || "Officer"} •
+                                {project.lead_details?.position || "Officer"} •
                                 <span className={isUserOnline(project.lead_details?.last_login) ? 'text-green-400' : 'text-gray-500'}>
                                     {isUserOnline(project.lead_details?.last_login) ? 'Available' : 'Away'}
                                 </span>
@@ -802,9 +934,9 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                                 <div className={`absolute bottom-0 right-0 w-2.5 h-2.5 rounded-full border-2 border-[#111] ${isUserOnline(m.last_login) ? 'bg-green-500' : 'bg-gray-500'}`} />
                             </div>
                             <div>
-                                <h4 className="font-bold text-gray-200">{m.profile?.full_name || m.username}</h4>
+                                <h4 className="font-bold text-gray-200">{m.full_name || m.username}</h4>
                                 <p className="text-[10px] text-gray-500 font-bold uppercase flex items-center gap-1">
-                                    {m.profile?.position || "Field Agent"} •
+                                    {m.position || "Field Agent"} •
                                     <span className={isUserOnline(m.last_login) ? 'text-green-400' : 'text-gray-500'}>
                                         {isUserOnline(m.last_login) ? 'Available' : 'Away'}
                                     </span>
@@ -833,7 +965,7 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                                 <div className="flex items-center gap-4">
                                     <div className="w-10 h-10 rounded-full bg-white/10 flex items-center justify-center">{req.user_details?.username?.[0]}</div>
                                     <div>
-                                        <h4 className="font-bold text-gray-100">{req.user_details?.profile?.full_name || req.user_details?.username}</h4>
+                                        <h4 className="font-bold text-gray-100">{req.user_details?.full_name || req.user_details?.username}</h4>
                                         <p className="text-[10px] text-cyan-400 font-bold uppercase tracking-wider">{req.user_position || "Member"}</p>
                                         {req.message && <p className="text-xs text-gray-500 mt-1 italic">"{req.message}"</p>}
                                     </div>